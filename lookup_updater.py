@@ -6,17 +6,25 @@ Features:
 - Download latest LOOKUPTABLE.xlsx from Google Drive (file link/ID)
 """
 
+import os
 import re
+import stat
 import sys
 import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from io import FileIO
 from urllib.request import urlopen, Request
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlencode, urlparse, parse_qs
+from xml.sax.saxutils import escape, unescape
 
 import openpyxl
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter, column_index_from_string, range_boundaries
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
@@ -24,12 +32,17 @@ from tkinter import filedialog, messagebox
 # =========================
 # Helpers
 # =========================
+_RE_ID = re.compile(r"[a-zA-Z0-9_-]{10,}")
+_RE_FILE = re.compile(r"/file/d/([a-zA-Z0-9_-]+)")
+_RE_FOLDER = re.compile(r"/folders/([a-zA-Z0-9_-]+)")
+_RE_CONFIRM = re.compile(rb"confirm=([0-9A-Za-z_]+)")
+_NORM_TBL = str.maketrans({"\u00A0": " ", "\u200B": "", "\ufeff": ""})
+
+
 def normalize_text(v) -> str:
     if v is None:
         return ""
-    s = str(v)
-    s = s.replace("\u00A0", " ").replace("\u200B", "").replace("\ufeff", "")
-    return s.strip()
+    return str(v).translate(_NORM_TBL).strip()
 
 
 def get_app_dir() -> Path:
@@ -39,11 +52,9 @@ def get_app_dir() -> Path:
 
 
 def autodetect_lookup(app_dir: Path) -> Path | None:
-    xlsx = sorted(app_dir.glob("*.xlsx"), key=lambda p: p.stat().st_mtime, reverse=True)
-    for p in xlsx:
-        if "LOOKUPTABLE" in p.name.upper():
-            return p
-    return None
+    # Filter by name first so only candidates are stat()ed
+    candidates = [(p.stat().st_mtime, p) for p in app_dir.glob("*.xlsx") if "LOOKUPTABLE" in p.name.upper()]
+    return max(candidates, key=lambda t: t[0], default=(None, None))[1]
 
 
 def now_stamp() -> str:
@@ -59,6 +70,10 @@ SCOPES = ["https://www.googleapis.com/auth/drive.file"]
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
 DRIVE_PENDING_FOLDER_ID = "1TAl_2hpp6HR08BvfIj81xSMlXrHBgwMM"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+HTTP_TIMEOUT = (10, 60)  # (connect, read) seconds; a stalled Drive link must not hang the worker
 
 
 BASE_CAT_TO_SHEET = {
@@ -109,7 +124,7 @@ REQUIRED_FIELDS_BY_SHEET = {
 }
 
 
-@dataclass
+@dataclass(frozen=True)
 class TableRowKey:
     category: str
     subcategory: str
@@ -117,55 +132,264 @@ class TableRowKey:
     rating_field: str
 
 
-def load_lookup_schema(lookup_path: Path):
-    wb = openpyxl.load_workbook(lookup_path, data_only=True)
+def _read_schema(wb):
     if TABLE_SHEET not in wb.sheetnames or ROUTING_SHEET not in wb.sheetnames:
         raise ValueError("LOOKUPTABLE.xlsx must contain TABLE and ROUTING_RULES sheets.")
 
     ws_table = wb[TABLE_SHEET]
-    hdr = {normalize_text(ws_table.cell(1, c).value): c for c in range(1, ws_table.max_column + 1)}
+    header = next(ws_table.iter_rows(max_row=1, values_only=True), ())
+    hdr = {normalize_text(v): c for c, v in enumerate(header, start=1)}
     required_cols = ["Category", "Subcategory", "Part_Name", "Rating_Field", "Rating_Value", "Rating_Unit"]
     for req in required_cols:
         if req not in hdr:
             raise ValueError(f"TABLE sheet missing column: {req}")
 
-    ws_rules = wb[ROUTING_SHEET]
-    rules = []
-    for r in range(2, ws_rules.max_row + 1):
-        cat = normalize_text(ws_rules.cell(r, 1).value)
-        sub = normalize_text(ws_rules.cell(r, 2).value)
-        sheet = normalize_text(ws_rules.cell(r, 3).value)
-        if not cat and not sub and not sheet:
-            continue
-        rules.append((cat.upper(), sub, sheet))
+    # ROUTING_RULES is only required to exist here; its rows are read by the parser, not the updater
+    return ws_table, hdr
 
-    return wb, ws_table, hdr, rules
 
+def load_lookup_schema_rw(lookup_path: Path):
+    """
+    Write variant for on_add/Save. data_only=False so formulas survive wb.save().
+    """
+    wb = openpyxl.load_workbook(lookup_path, data_only=False, keep_vba=False)
+    ws_table, hdr = _read_schema(wb)
+    return wb, ws_table, hdr
+
+
+def load_lookup_schema_ro(lookup_path: Path):
+    """
+    Read-only variant for display/refresh paths (no save).
+    Streams rows instead of building Cell objects; caller must wb.close().
+    """
+    wb = openpyxl.load_workbook(lookup_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws_table, hdr = _read_schema(wb)
+    except Exception:
+        wb.close()
+        raise
+    # Do not trust a stale <dimension>; iterate every stored row
+    ws_table.reset_dimensions()
+    return wb, ws_table, hdr
+
+
+def scan_table(ws):
+    """
+    Single pass over TABLE: header index, subcategory map and row index together.
+    Returns (idx, sub_map, row_index, last_row); idx holds 0-based column positions.
+    """
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, ())
+    idx = {normalize_text(h): i for i, h in enumerate(header)}
+    c_cat, c_sub, c_part, c_fld = (idx[k] for k in ("Category", "Subcategory", "Part_Name", "Rating_Field"))
+    width = max(c_cat, c_sub, c_part, c_fld) + 1
 
-def build_subcategory_map(wb) -> dict:
-    ws = wb[TABLE_SHEET]
-    hdr = {normalize_text(ws.cell(1, c).value): c for c in range(1, ws.max_column + 1)}
     sub_map = {}
-    for r in range(2, ws.max_row + 1):
-        cat = normalize_text(ws.cell(r, hdr["Category"]).value).upper()
-        sub = normalize_text(ws.cell(r, hdr["Subcategory"]).value)
+    row_index = {}
+    last_row = 1
+    for r, row in enumerate(rows, start=2):
+        last_row = r
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        cat = normalize_text(row[c_cat]).upper()
         if not cat:
             continue
+        sub = normalize_text(row[c_sub])
         sub_map.setdefault(cat, set()).add(sub)
-    return {k: sorted(v) for k, v in sub_map.items()}
-
 
-def build_row_index(ws, hdr) -> dict:
-    index = {}
-    for r in range(2, ws.max_row + 1):
-        cat = normalize_text(ws.cell(r, hdr["Category"]).value).upper()
-        sub = normalize_text(ws.cell(r, hdr["Subcategory"]).value)
-        part = normalize_text(ws.cell(r, hdr["Part_Name"]).value)
-        field = normalize_text(ws.cell(r, hdr["Rating_Field"]).value).upper()
-        if not cat or not part or not field:
+        part = normalize_text(row[c_part])
+        field = normalize_text(row[c_fld]).upper()
+        if not part or not field:
             continue
-        index[TableRowKey(cat, sub, part, field)] = r
-    return index
+        row_index[TableRowKey(cat, sub, part, field)] = r
+
+    return idx, {k: sorted(v) for k, v in sub_map.items()}, row_index, last_row
+
+
+_LOOKUP_CACHE: dict[tuple, tuple] = {}
+_LOOKUP_CACHE_MAX = 2
+
+
+def _lookup_cache_key(lookup_path: Path, st: os.stat_result | None = None) -> tuple:
+    if st is None:
+        st = os.stat(lookup_path)
+    return (os.path.abspath(lookup_path), st.st_mtime_ns, st.st_size)
+
+
+def get_lookup(lookup_path: Path, st: os.stat_result | None = None):
+    """
+    Cached read-only parse of the lookup: (hdr, sub_map, row_index, last_row).
+    Keyed on (path, mtime_ns, size) so an edited/replaced file is re-parsed.
+    Pass st if the caller already stat()ed the file.
+    """
+    key = _lookup_cache_key(lookup_path, st)
+    hit = _LOOKUP_CACHE.pop(key, None)
+    if hit is None:
+        wb, ws_table, hdr = load_lookup_schema_ro(lookup_path)
+        try:
+            _, sub_map, row_index, last_row = scan_table(ws_table)
+        finally:
+            wb.close()
+        hit = (hdr, sub_map, row_index, last_row)
+        evict_lookup(lookup_path)
+        while len(_LOOKUP_CACHE) >= _LOOKUP_CACHE_MAX:
+            del _LOOKUP_CACHE[next(iter(_LOOKUP_CACHE))]
+    _LOOKUP_CACHE[key] = hit
+    return hit
+
+
+def evict_lookup(lookup_path: Path):
+    path_s = os.path.abspath(lookup_path)
+    for k in [k for k in _LOOKUP_CACHE if k[0] == path_s]:
+        del _LOOKUP_CACHE[k]
+
+
+# =========================
+# Lookup save (TABLE sheet patch)
+# =========================
+_RE_SHEET_DATA = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_RE_ROW = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_RE_CELL = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_RE_ROW_NUM = re.compile(r'\br="(\d+)"')
+_RE_CELL_REF = re.compile(r'\br="([A-Z]+)(\d+)"')
+_RE_STYLE = re.compile(r'\bs="(\d+)"')
+_RE_SPANS = re.compile(r'\s+spans="[^"]*"')
+_RE_DIMENSION = re.compile(r'<dimension\s+ref="([^"]+)"\s*/>')
+
+
+def _sheet_part_name(zf: zipfile.ZipFile, sheet_name: str) -> str | None:
+    wb_xml = zf.read("xl/workbook.xml").decode("utf-8")
+    rid = None
+    for m in re.finditer(r"<sheet\b([^>]*)/>", wb_xml):
+        name = re.search(r'\bname="([^"]*)"', m.group(1))
+        if name and unescape(name.group(1), {"&quot;": '"', "&apos;": "'"}) == sheet_name:
+            rid = re.search(r'\br:id="([^"]*)"', m.group(1))
+            break
+    if not rid:
+        return None
+
+    rels = zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    for m in re.finditer(r"<Relationship\b([^>]*)/>", rels):
+        rel_id = re.search(r'\bId="([^"]*)"', m.group(1))
+        target = re.search(r'\bTarget="([^"]*)"', m.group(1))
+        if rel_id and target and rel_id.group(1) == rid.group(1):
+            t = target.group(1)
+            return t.lstrip("/") if t.startswith("/") else f"xl/{t}"
+    return None
+
+
+def _cell_xml(col: int, row: int, value, style: str) -> str:
+    ref = f"{get_column_letter(col)}{row}"
+    if value is None or value == "":
+        return f'<c r="{ref}"{style}/>'
+    text = escape(str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+
+def _patch_row_xml(row: int, attrs: str, inner: str, cols: dict) -> str | None:
+    cells = {}
+    for m in _RE_CELL.finditer(inner):
+        ref = _RE_CELL_REF.search(m.group(1))
+        if not ref:
+            return None
+        cells[column_index_from_string(ref.group(1))] = m.group(0)
+
+    for col, value in cols.items():
+        style = ""
+        if col in cells:
+            s = _RE_STYLE.search(_RE_CELL.match(cells[col]).group(1))
+            style = f' s="{s.group(1)}"' if s else ""
+        cells[col] = _cell_xml(col, row, value, style)
+
+    # spans is only a hint and may no longer match the cells
+    attrs = _RE_SPANS.sub("", attrs)
+    return f"<row{attrs}>" + "".join(cells[c] for c in sorted(cells)) + "</row>"
+
+
+def _patch_sheet_xml(xml: str, changes: dict) -> str | None:
+    m = _RE_SHEET_DATA.search(xml)
+    if not m:
+        return None
+
+    rows = {}
+    for rm in _RE_ROW.finditer(m.group(1) or ""):
+        num = _RE_ROW_NUM.search(rm.group(1))
+        if not num:
+            return None
+        rows[int(num.group(1))] = rm
+
+    out = {r: rm.group(0) for r, rm in rows.items()}
+    for r, cols in changes.items():
+        if r in rows:
+            patched = _patch_row_xml(r, rows[r].group(1), rows[r].group(2) or "", cols)
+        else:
+            patched = _patch_row_xml(r, f' r="{r}"', "", cols)
+        if patched is None:
+            return None
+        out[r] = patched
+
+    body = "<sheetData>" + "".join(out[r] for r in sorted(out)) + "</sheetData>"
+    xml = xml[:m.start()] + body + xml[m.end():]
+
+    dim = _RE_DIMENSION.search(xml)
+    if dim and out:
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(dim.group(1))
+        except (TypeError, ValueError):
+            return xml
+        max_row = max(max_row or 0, max(out))
+        max_col = max(max_col or 0, max((c for cols in changes.values() for c in cols), default=0))
+        ref = f"{get_column_letter(min_col or 1)}{min_row or 1}:{get_column_letter(max_col)}{max_row}"
+        xml = xml[:dim.start()] + f'<dimension ref="{ref}"/>' + xml[dim.end():]
+    return xml
+
+
+def patch_table_sheet(lookup_path: Path, changes: dict) -> bool:
+    """
+    Write {row: {col: value}} (1-based) into the TABLE sheet by rewriting only
+    that sheet's XML part; styles, shared strings and other sheets are copied as-is.
+    Returns False (file untouched) if the workbook layout is not one this can patch.
+    """
+    for cols in changes.values():
+        for v in cols.values():
+            if isinstance(v, str) and ILLEGAL_CHARACTERS_RE.search(v):
+                return False
+
+    with zipfile.ZipFile(lookup_path) as zin:
+        try:
+            part = _sheet_part_name(zin, TABLE_SHEET)
+            xml = zin.read(part).decode("utf-8") if part else None
+        except (KeyError, UnicodeDecodeError):
+            return False
+        if xml is None:
+            return False
+        patched = _patch_sheet_xml(xml, changes)
+        if patched is None:
+            return False
+
+        tmp = lookup_path.with_name(f"{lookup_path.name}.tmp")
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zin.infolist():
+                data = patched.encode("utf-8") if item.filename == part else zin.read(item.filename)
+                zout.writestr(item, data)
+
+    os.replace(tmp, lookup_path)
+    return True
+
+
+def save_table_changes(lookup_path: Path, changes: dict):
+    """
+    Persist pending TABLE edits. Patches the sheet XML in place when possible,
+    otherwise falls back to a full openpyxl load/save.
+    """
+    if patch_table_sheet(lookup_path, changes):
+        return
+    wb, ws_table, _ = load_lookup_schema_rw(lookup_path)
+    for r, cols in changes.items():
+        for c, v in cols.items():
+            ws_table.cell(r, c).value = v
+    wb.save(lookup_path)
 
 
 # =========================
@@ -177,14 +401,14 @@ def extract_drive_file_id(link: str) -> str | None:
         return None
 
     # Direct file ID
-    if re.fullmatch(r"[a-zA-Z0-9_-]{10,}", link):
+    if _RE_ID.fullmatch(link):
         return link
 
     if "drive.google.com" not in link:
         return None
 
     if "/file/d/" in link:
-        m = re.search(r"/file/d/([a-zA-Z0-9_-]+)", link)
+        m = _RE_FILE.search(link)
         return m.group(1) if m else None
 
     parsed = urlparse(link)
@@ -202,27 +426,82 @@ def is_drive_folder_link(link: str) -> bool:
 def extract_drive_folder_id(link: str) -> str | None:
     if "drive.google.com" not in link:
         return None
-    m = re.search(r"/folders/([a-zA-Z0-9_-]+)", link)
+    m = _RE_FOLDER.search(link)
     return m.group(1) if m else None
 
 
-def download_drive_file(file_id: str, dest_path: Path):
-    url = f"https://drive.google.com/uc?export=download&id={file_id}"
-    req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urlopen(req) as resp:
-        data = resp.read()
+_HTTP_SESSION = None
 
-    # Handle confirm token if Google warns about large files
-    if b"confirm=" in data and b"uc?export=download" in data:
-        m = re.search(rb"confirm=([0-9A-Za-z_]+)", data)
+
+def _http_session():
+    """
+    Shared keep-alive session for Drive link downloads (probe + confirm reuse one connection).
+    requests is already required by google-auth's transport.
+    """
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        import requests
+
+        _HTTP_SESSION = requests.Session()
+        _HTTP_SESSION.headers["User-Agent"] = "Mozilla/5.0"
+    return _HTTP_SESSION
+
+
+_DRIVE_UC_URL = "https://drive.google.com/uc"
+
+
+@contextmanager
+def _open_drive_stream(params: dict):
+    """
+    GET the Drive link endpoint and yield an iterator of byte chunks.
+    Uses the shared requests session; falls back to urllib if requests is unavailable.
+    """
+    try:
+        session = _http_session()
+    except ImportError:
+        session = None
+
+    if session is not None:
+        with session.get(_DRIVE_UC_URL, params=params, stream=True, timeout=HTTP_TIMEOUT) as resp:
+            resp.raise_for_status()
+            yield resp.iter_content(chunk_size=65536)
+        return
+
+    req = Request(f"{_DRIVE_UC_URL}?{urlencode(params)}", headers={"User-Agent": "Mozilla/5.0"})
+    with urlopen(req, timeout=HTTP_TIMEOUT[1]) as resp:
+        yield iter(lambda: resp.read(65536), b"")
+
+
+def _confirm_token(head: bytes) -> str | None:
+    # Google answers large files with a small HTML warning page carrying a confirm token
+    if b"confirm=" in head and b"uc?export=download" in head:
+        m = _RE_CONFIRM.search(head)
         if m:
-            token = m.group(1).decode("utf-8")
-            url2 = f"https://drive.google.com/uc?export=download&confirm={token}&id={file_id}"
-            req2 = Request(url2, headers={"User-Agent": "Mozilla/5.0"})
-            with urlopen(req2) as resp2:
-                data = resp2.read()
+            return m.group(1).decode("utf-8")
+    return None
+
+
+def _write_chunks(dest_path: Path, chunks, head: bytes = b""):
+    with open(dest_path, "wb", buffering=1 << 20) as f:
+        f.write(head)
+        for chunk in chunks:
+            f.write(chunk)
 
-    dest_path.write_bytes(data)
+
+def download_drive_file(file_id: str, dest_path: Path):
+    params = {"export": "download", "id": file_id}
+    with _open_drive_stream(params) as chunks:
+        # Peek only the head: the large-file warning page is small HTML
+        head = next(chunks, b"")
+        token = _confirm_token(head)
+        if token is None:
+            _write_chunks(dest_path, chunks, head)
+            return
+
+    # Handle confirm token if Google warns about large files
+    params["confirm"] = token
+    with _open_drive_stream(params) as chunks:
+        _write_chunks(dest_path, chunks)
 
 
 def get_drive_service(app_dir: Path):
@@ -254,45 +533,87 @@ def get_drive_service(app_dir: Path):
             creds = flow.run_local_server(port=0)
         token_path.write_text(creds.to_json(), encoding="utf-8")
 
-    return build("drive", "v3", credentials=creds)
+    # Bundled discovery doc: no discovery HTTPS round-trip, no file cache warnings
+    return build("drive", "v3", credentials=creds, cache_discovery=False, static_discovery=True)
 
 
-def get_latest_file_in_folder(service, folder_id: str) -> dict | None:
-    q = f"'{folder_id}' in parents and trashed = false"
+def _list_folder_newest(service, q: str, page_size: int) -> list:
     resp = service.files().list(
         q=q,
         orderBy="modifiedTime desc",
         fields="files(id,name,modifiedTime,mimeType)",
-        pageSize=50,
+        pageSize=page_size,
     ).execute()
-    files = resp.get("files", [])
-    if not files:
-        return None
+    return resp.get("files", [])
+
 
-    for f in files:
+def get_latest_file_in_folder(service, folder_id: str) -> dict | None:
+    # Server filters on the xlsx MIME type and sorts newest first. (Drive's
+    # `name contains` is a prefix match, so it cannot select on the .xlsx extension.)
+    base_q = f"'{folder_id}' in parents and trashed = false"
+    files = _list_folder_newest(service, f"{base_q} and mimeType = '{XLSX_MIME}'", 10)
+    if files:
+        for f in files:
+            if f.get("name", "").lower().endswith(".xlsx"):
+                return f
+        return files[0]
+
+    # Fallback: an .xlsx uploaded under a generic MIME type (e.g. application/octet-stream)
+    for f in _list_folder_newest(service, base_q, 50):
         if f.get("name", "").lower().endswith(".xlsx"):
             return f
-    return files[0]
+    return None
 
 
 def download_drive_file_via_api(service, file_id: str, dest_path: Path):
     from googleapiclient.http import MediaIoBaseDownload
 
     req = service.files().get_media(fileId=file_id)
-    with FileIO(dest_path, "wb") as fh:
-        downloader = MediaIoBaseDownload(fh, req)
+    with open(dest_path, "wb", buffering=1024 * 1024) as fh:
+        downloader = MediaIoBaseDownload(fh, req, chunksize=DOWNLOAD_CHUNK_SIZE)
         done = False
         while not done:
-            _, done = downloader.next_chunk()
+            _, done = downloader.next_chunk(num_retries=3)
 
 
-def upload_drive_file(service, file_path: Path, folder_id: str, mime_type: str | None = None):
+def upload_drive_file(service, file_path: Path, folder_id: str, mime_type: str | None = None, progress=None):
     from googleapiclient.http import MediaFileUpload
 
     body = {"name": file_path.name, "parents": [folder_id]}
-    media = MediaFileUpload(str(file_path), mimetype=mime_type, resumable=False)
+    media = MediaFileUpload(str(file_path), mimetype=mime_type, resumable=True, chunksize=UPLOAD_CHUNK_SIZE)
     req = service.files().create(body=body, media_body=media, fields="id")
-    return req.execute()
+    resp = None
+    while resp is None:
+        status, resp = req.next_chunk()
+        if status and progress:
+            progress(status.progress())
+    return resp
+
+
+def upload_drive_files(app_dir: Path, files: list, folder_id: str, progress=None, service=None) -> list:
+    """
+    Upload [(path, mime_type), ...] concurrently; progress(path, fraction) per chunk.
+    The googleapiclient http object is not thread-safe, so only the first worker
+    uses `service`; the others build their own.
+    """
+    # Authorize once up front so a browser OAuth flow never runs in two threads
+    if service is None:
+        service = get_drive_service(app_dir)
+
+    def _upload(i, path, mime_type):
+        svc = service if i == 0 else get_drive_service(app_dir)
+        on_chunk = (lambda frac: progress(path, frac)) if progress else None
+        return upload_drive_file(svc, path, folder_id, mime_type=mime_type, progress=on_chunk)
+
+    with ThreadPoolExecutor(max_workers=len(files)) as ex:
+        futs = [ex.submit(_upload, i, path, mime_type) for i, (path, mime_type) in enumerate(files)]
+        return [f.result() for f in futs]
+
+
+_REPORT_RECORD_FMT = (
+    "  - Part={part}, Category={category}, Subcategory={sub}, "
+    "Field={field}, Value={value}, Unit={unit}"
+)
 
 
 def format_upload_report(records: list, lookup_path: Path) -> str:
@@ -302,32 +623,17 @@ def format_upload_report(records: list, lookup_path: Path) -> str:
     lines.append(f"- Source: {lookup_path}")
     lines.append("")
 
-    added = [r for r in records if r["action"] == "added"]
-    updated = [r for r in records if r["action"] == "updated"]
-
-    lines.append("[1] Added Records")
-    if not added:
-        lines.append("  - None")
-    else:
-        for r in added:
-            sub = r["subcategory"] if r["subcategory"] else "(blank)"
-            lines.append(
-                f"  - Part={r['part']}, Category={r['category']}, Subcategory={sub}, "
-                f"Field={r['field']}, Value={r['value']}, Unit={r['unit']}"
-            )
-    lines.append("")
+    added, updated = [], []
+    for r in records:
+        (added if r["action"] == "added" else updated).append(r)
 
-    lines.append("[2] Updated Records")
-    if not updated:
-        lines.append("  - None")
-    else:
-        for r in updated:
-            sub = r["subcategory"] if r["subcategory"] else "(blank)"
-            lines.append(
-                f"  - Part={r['part']}, Category={r['category']}, Subcategory={sub}, "
-                f"Field={r['field']}, Value={r['value']}, Unit={r['unit']}"
-            )
-    lines.append("")
+    for title, recs in (("[1] Added Records", added), ("[2] Updated Records", updated)):
+        lines.append(title)
+        if not recs:
+            lines.append("  - None")
+        else:
+            lines.extend(_REPORT_RECORD_FMT.format(sub=r["subcategory"] or "(blank)", **r) for r in recs)
+        lines.append("")
 
     return "\n".join(lines)
 
@@ -335,6 +641,12 @@ def format_upload_report(records: list, lookup_path: Path) -> str:
 # =========================
 # GUI
 # =========================
+_STALE_SESSION_MSG = (
+    "{name} was changed outside this tool after your edits started.\n"
+    "Press Reload Lookup (and choose not to save) to discard the unsaved edits, then add them again."
+)
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -352,19 +664,36 @@ class App(tk.Tk):
 
         self.rating_entries = {}
         self.allowed_fields = []
+        self._rating_header = []
+        self._rating_pool = []  # [(Label, value Entry, unit Entry)], reused across sheet changes
         self.subcat_map = {}
         self.change_records = []
 
+        # Session edits: {row: {col: value}} stay in memory until Save
+        self.wb_path = None
+        self.hdr = {}
+        self.row_index = {}
+        self.next_row = 2
+        self.pending = {}
+        self.dirty = False
+        self._session_key = None  # (path, mtime_ns, size) the row map was built from
+        self._lookup_st = None
+        self._drive_service = None
+        self._busy = False  # a Drive job is running on the worker thread
+
         pad = {"padx": 10, "pady": 6}
 
-        self._row_file("LookupTable (.xlsx)", self.var_lookup, self.browse_lookup, 0, **pad)
+        self.btn_browse_lookup = self._row_file("LookupTable (.xlsx)", self.var_lookup, self.browse_lookup, 0, **pad)
         self._row_text("Drive file link/ID", self.var_drive_link, 1, **pad)
 
         frm_down = tk.Frame(self)
         frm_down.grid(row=2, column=0, columnspan=3, sticky="ew", padx=10, pady=6)
-        tk.Button(frm_down, text="Download Latest", width=18, command=self.on_download).pack(side="left")
-        tk.Button(frm_down, text="Upload to Drive", width=18, command=self.on_upload).pack(side="left", padx=8)
-        tk.Button(frm_down, text="Reload Lookup", width=18, command=self.on_reload).pack(side="left", padx=8)
+        self.btn_download = tk.Button(frm_down, text="Download Latest", width=18, command=self.on_download)
+        self.btn_download.pack(side="left")
+        self.btn_upload = tk.Button(frm_down, text="Upload to Drive", width=18, command=self.on_upload)
+        self.btn_upload.pack(side="left", padx=8)
+        self.btn_reload = tk.Button(frm_down, text="Reload Lookup", width=18, command=self.on_reload)
+        self.btn_reload.pack(side="left", padx=8)
 
         tk.Label(self, text="Part Add / Update", anchor="w").grid(
             row=3, column=0, columnspan=3, sticky="w", padx=10, pady=10
@@ -382,8 +711,12 @@ class App(tk.Tk):
         frm_btn.grid(row=9, column=0, columnspan=3, sticky="ew", padx=10, pady=10)
         self.btn_add = tk.Button(frm_btn, text="Add / Update", width=16, command=self.on_add)
         self.btn_add.pack(side="left")
-        tk.Button(frm_btn, text="Clear", width=14, command=self.on_clear).pack(side="left", padx=8)
-        tk.Button(frm_btn, text="Quit", width=14, command=self.destroy).pack(side="right")
+        self.btn_save = tk.Button(frm_btn, text="Save", width=14, command=self.on_save)
+        self.btn_save.pack(side="left", padx=8)
+        self.btn_clear = tk.Button(frm_btn, text="Clear", width=14, command=self.on_clear)
+        self.btn_clear.pack(side="left", padx=8)
+        tk.Button(frm_btn, text="Quit", width=14, command=self.on_quit).pack(side="right")
+        self.protocol("WM_DELETE_WINDOW", self.on_quit)
 
         lbl_status = tk.Label(self, textvariable=self.var_status, anchor="w")
         lbl_status.grid(row=10, column=0, columnspan=3, sticky="ew", padx=10, pady=6)
@@ -401,7 +734,9 @@ class App(tk.Tk):
     def _row_file(self, label, var, cmd, r, padx=10, pady=6):
         tk.Label(self, text=label, width=18, anchor="w").grid(row=r, column=0, padx=padx, pady=pady, sticky="w")
         tk.Entry(self, textvariable=var, width=88).grid(row=r, column=1, padx=padx, pady=pady, sticky="w")
-        tk.Button(self, text="Browse...", width=12, command=cmd).grid(row=r, column=2, padx=padx, pady=pady)
+        btn = tk.Button(self, text="Browse...", width=12, command=cmd)
+        btn.grid(row=r, column=2, padx=padx, pady=pady)
+        return btn
 
     def _row_text(self, label, var, r, padx=10, pady=6):
         tk.Label(self, text=label, width=18, anchor="w").grid(row=r, column=0, padx=padx, pady=pady, sticky="w")
@@ -423,14 +758,16 @@ class App(tk.Tk):
             self.on_reload()
 
     def on_reload(self):
-        lk = Path(self.var_lookup.get())
-        if not lk.exists():
+        if not self._resolve_unsaved():
+            return
+
+        lk = self._validated_lookup_path(None)
+        if lk is None:
             self.var_status.set("LookupTable not found.")
             return
 
         try:
-            wb, _, _, _ = load_lookup_schema(lk)
-            self.subcat_map = build_subcategory_map(wb)
+            _, self.subcat_map, _, _ = get_lookup(lk, self._lookup_st)
 
             self._set_sheet_options(sorted(ALLOWED_CATS_BY_SHEET.keys()))
             self.var_status.set("LookupTable loaded.")
@@ -484,23 +821,38 @@ class App(tk.Tk):
         self._set_subcategory_options(subs)
 
     def _build_rating_fields(self, sheet):
-        for widget in self.frm_ratings.winfo_children():
-            widget.destroy()
         self.rating_entries.clear()
 
         fields = ALLOWED_FIELDS_BY_SHEET.get(sheet, [])
         self.allowed_fields = fields
 
-        tk.Label(self.frm_ratings, text="Rating Field", width=20, anchor="w").grid(row=0, column=0, padx=6)
-        tk.Label(self.frm_ratings, text="Value", width=18, anchor="w").grid(row=0, column=1, padx=6)
-        tk.Label(self.frm_ratings, text="Unit", width=12, anchor="w").grid(row=0, column=2, padx=6)
-
-        for i, f in enumerate(fields, start=1):
-            tk.Label(self.frm_ratings, text=f, width=20, anchor="w").grid(row=i, column=0, padx=6, pady=3)
-            v = tk.Entry(self.frm_ratings, width=20)
-            u = tk.Entry(self.frm_ratings, width=12)
-            v.grid(row=i, column=1, padx=6, pady=3, sticky="w")
-            u.grid(row=i, column=2, padx=6, pady=3, sticky="w")
+        if not self._rating_header:
+            for c, (text, width) in enumerate((("Rating Field", 20), ("Value", 18), ("Unit", 12))):
+                lbl = tk.Label(self.frm_ratings, text=text, width=width, anchor="w")
+                lbl.grid(row=0, column=c, padx=6)
+                self._rating_header.append(lbl)
+
+        # Reuse pooled widgets; only create rows the pool does not have yet
+        while len(self._rating_pool) < len(fields):
+            self._rating_pool.append((
+                tk.Label(self.frm_ratings, width=20, anchor="w"),
+                tk.Entry(self.frm_ratings, width=20),
+                tk.Entry(self.frm_ratings, width=12),
+            ))
+
+        for i, (lbl, v, u) in enumerate(self._rating_pool):
+            if i >= len(fields):
+                lbl.grid_remove()
+                v.grid_remove()
+                u.grid_remove()
+                continue
+            f = fields[i]
+            lbl.configure(text=f)
+            v.delete(0, "end")
+            u.delete(0, "end")
+            lbl.grid(row=i + 1, column=0, padx=6, pady=3)
+            v.grid(row=i + 1, column=1, padx=6, pady=3, sticky="w")
+            u.grid(row=i + 1, column=2, padx=6, pady=3, sticky="w")
             self.rating_entries[f] = (v, u)
 
     def on_clear(self):
@@ -512,10 +864,113 @@ class App(tk.Tk):
         self.var_status.set("Cleared.")
         self.on_reload()
 
-    def on_add(self):
+    def _validated_lookup_path(self, error_msg: str | None) -> Path | None:
+        """
+        Stat the lookup path once (exists + mtime/size in one syscall) and keep
+        the result for the lookup cache key. Shows error_msg and returns None if invalid.
+        """
         lk = Path(self.var_lookup.get())
-        if not lk.exists():
-            messagebox.showerror("Error", "LookupTable file not found.")
+        try:
+            st = os.stat(lk)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            self._lookup_st = None
+            if error_msg:
+                messagebox.showerror("Error", error_msg)
+            return None
+        self._lookup_st = st
+        return lk
+
+    def _session_table(self, lk: Path):
+        key = _lookup_cache_key(lk, self._lookup_st)
+        if self.wb_path == lk and self._session_key != key:
+            if self.pending:
+                raise ValueError(_STALE_SESSION_MSG.format(name=lk.name))
+            self.wb_path = None  # changed on disk, nothing pending: rebuild below
+        if self.wb_path != lk:
+            hdr, _, row_index, last_row = get_lookup(lk, self._lookup_st)
+            self.hdr = hdr
+            self.row_index = dict(row_index)
+            self.next_row = last_row + 1
+            self.pending = {}
+            self.wb_path = lk
+            self._session_key = key
+            self.dirty = False
+        return self.hdr, self.row_index
+
+    def _drop_session(self):
+        self.wb_path = None
+        self.hdr = {}
+        self.row_index = {}
+        self.next_row = 2
+        self.pending = {}
+        self._session_key = None
+        self.dirty = False
+
+    def _save_session(self) -> Path:
+        lk = self.wb_path
+        # Pending rows were numbered against the file as it was when the session started;
+        # if it was edited elsewhere since, writing them would overwrite/shift other rows.
+        if _lookup_cache_key(lk) != self._session_key:
+            raise ValueError(_STALE_SESSION_MSG.format(name=lk.name))
+        backup = lk.with_name(f"{lk.stem}_backup_{now_stamp()}{lk.suffix}")
+        shutil.copy2(lk, backup)
+        save_table_changes(lk, self.pending)
+        evict_lookup(lk)
+        self._session_key = _lookup_cache_key(lk)
+        self.pending = {}
+        self.dirty = False
+        return backup
+
+    def _resolve_unsaved(self) -> bool:
+        """
+        Save or discard pending edits before the session workbook is dropped.
+        Returns False if the user cancelled (or the save failed).
+        """
+        if self.dirty:
+            ans = messagebox.askyesnocancel(
+                "Unsaved changes",
+                f"Save changes to {self.wb_path.name} first?",
+            )
+            if ans is None:
+                return False
+            if ans:
+                try:
+                    self._save_session()
+                except Exception as e:
+                    self.var_status.set("Save failed.")
+                    messagebox.showerror("Error", f"{e}")
+                    return False
+        self._drop_session()
+        return True
+
+    def on_save(self):
+        if not self.dirty:
+            self.var_status.set("Nothing to save.")
+            return
+
+        try:
+            lk = self.wb_path
+            backup = self._save_session()
+            self.var_status.set("Saved.")
+            messagebox.showinfo("Done", f"Saved to: {lk}\nBackup: {backup}")
+
+        except Exception as e:
+            self.var_status.set("Save failed.")
+            messagebox.showerror("Error", f"{e}")
+
+    def on_quit(self):
+        # The Drive job runs on a daemon thread; closing now would kill it mid-write/mid-replace
+        if self._busy:
+            messagebox.showwarning("Busy", "A download/upload is still running. Please wait until it finishes.")
+            return
+        if self._resolve_unsaved():
+            self.destroy()
+
+    def on_add(self):
+        lk = self._validated_lookup_path("LookupTable file not found.")
+        if lk is None:
             return
 
         sheet = self.var_sheet.get()
@@ -547,18 +1002,26 @@ class App(tk.Tk):
                 messagebox.showerror("Error", "At least one rating field is required.")
                 return
 
+        if self.wb_path is not None and self.wb_path != lk and not self._resolve_unsaved():
+            return
+
         try:
-            wb, ws_table, hdr, _ = load_lookup_schema(lk)
-            row_index = build_row_index(ws_table, hdr)
+            hdr, row_index = self._session_table(lk)
 
             updated = 0
             appended = 0
+            next_row = self.next_row
+            c_cat, c_sub, c_part, c_fld, c_val, c_unit = (
+                hdr[k] for k in ("Category", "Subcategory", "Part_Name", "Rating_Field", "Rating_Value", "Rating_Unit")
+            )
+            pending = self.pending
             for field, (val, unit) in filled.items():
                 key = TableRowKey(cat, sub, part, field)
                 if key in row_index:
                     r = row_index[key]
-                    ws_table.cell(r, hdr["Rating_Value"]).value = val
-                    ws_table.cell(r, hdr["Rating_Unit"]).value = unit
+                    cells = pending.setdefault(r, {})
+                    cells[c_val] = val
+                    cells[c_unit] = unit
                     self.change_records.append({
                         "action": "updated",
                         "category": cat,
@@ -570,13 +1033,17 @@ class App(tk.Tk):
                     })
                     updated += 1
                 else:
-                    r = ws_table.max_row + 1
-                    ws_table.cell(r, hdr["Category"]).value = cat
-                    ws_table.cell(r, hdr["Subcategory"]).value = sub
-                    ws_table.cell(r, hdr["Part_Name"]).value = part
-                    ws_table.cell(r, hdr["Rating_Field"]).value = field
-                    ws_table.cell(r, hdr["Rating_Value"]).value = val
-                    ws_table.cell(r, hdr["Rating_Unit"]).value = unit
+                    r = next_row
+                    next_row += 1
+                    pending[r] = {
+                        c_cat: cat,
+                        c_sub: sub,
+                        c_part: part,
+                        c_fld: field,
+                        c_val: val,
+                        c_unit: unit,
+                    }
+                    row_index[key] = r
                     self.change_records.append({
                         "action": "added",
                         "category": cat,
@@ -588,67 +1055,124 @@ class App(tk.Tk):
                     })
                     appended += 1
 
-            backup = lk.with_name(f"{lk.stem}_backup_{now_stamp()}{lk.suffix}")
-            shutil.copy2(lk, backup)
-            wb.save(lk)
+            self.next_row = next_row
+            if updated or appended:
+                self.dirty = True
 
-            self.var_status.set("Updated.")
+            self.var_status.set("Updated (not saved).")
             messagebox.showinfo(
                 "Done",
-                f"Saved to: {lk}\nBackup: {backup}\nUpdated: {updated}, Added: {appended}",
+                f"Updated: {updated}, Added: {appended}\nPress Save to write: {lk}",
             )
 
         except Exception as e:
             self.var_status.set("Error.")
             messagebox.showerror("Error", f"{e}")
 
+    def _svc(self):
+        # Only used from one job at a time (buttons are disabled while busy)
+        if self._drive_service is None:
+            self._drive_service = get_drive_service(get_app_dir())
+        return self._drive_service
+
+    def _set_busy(self, busy: bool):
+        self._busy = busy
+        state = "disabled" if busy else "normal"
+        # Clear reloads and Browse switches the lookup, so both stay off while a job may be replacing the file
+        for btn in (self.btn_download, self.btn_upload, self.btn_reload, self.btn_add, self.btn_save,
+                    self.btn_clear, self.btn_browse_lookup):
+            btn.config(state=state)
+
+    def _run_async(self, fn, on_done, on_err, on_poll=None):
+        """
+        Run fn() on a worker thread so network IO does not freeze the GUI.
+        on_done(result) / on_err(exc) are called back on the Tk thread;
+        on_poll() (optional) runs on the Tk thread while the job is pending.
+        """
+        box = {}
+
+        def worker():
+            try:
+                box["result"] = fn()
+            except Exception as e:
+                box["error"] = e
+
+        t = threading.Thread(target=worker, daemon=True)
+
+        def poll():
+            if t.is_alive():
+                if on_poll:
+                    try:
+                        on_poll()
+                    except Exception:
+                        pass  # a progress display glitch must not stop the poll (buttons stay busy otherwise)
+                self.after(100, poll)
+                return
+            self._set_busy(False)
+            if "error" in box:
+                on_err(box["error"])
+            else:
+                on_done(box.get("result"))
+
+        self._set_busy(True)
+        t.start()
+        self.after(100, poll)
+
     def on_download(self):
         link = self.var_drive_link.get().strip()
         if not link:
             messagebox.showerror("Error", "Enter a Google Drive file link or file ID.")
             return
 
-        lk = Path(self.var_lookup.get())
-        if not lk.exists():
-            messagebox.showerror("Error", "LookupTable path is invalid.")
+        lk = self._validated_lookup_path("LookupTable path is invalid.")
+        if lk is None:
+            return
+        if not self._resolve_unsaved():
             return
 
-        try:
-            tmp = lk.with_name(f"{lk.stem}_download_{now_stamp()}{lk.suffix}")
-            self.var_status.set("Downloading...")
-            self.update_idletasks()
-
-            if is_drive_folder_link(link):
-                folder_id = extract_drive_folder_id(link)
-                if not folder_id:
-                    raise ValueError("Unable to extract folder ID from link.")
-                service = get_drive_service(get_app_dir())
-                latest = get_latest_file_in_folder(service, folder_id)
-                if not latest:
-                    raise ValueError("No files found in folder.")
-                download_drive_file_via_api(service, latest["id"], tmp)
-            else:
-                file_id = extract_drive_file_id(link)
-                if not file_id:
-                    raise ValueError("Unable to extract file ID from link.")
-                download_drive_file(file_id, tmp)
+        def do_download():
+            # .part suffix: a partial download is never picked up by autodetect_lookup (*.xlsx)
+            tmp = lk.with_name(f"{lk.stem}_download_{now_stamp()}{lk.suffix}.part")
+            try:
+                if is_drive_folder_link(link):
+                    folder_id = extract_drive_folder_id(link)
+                    if not folder_id:
+                        raise ValueError("Unable to extract folder ID from link.")
+                    service = self._svc()
+                    latest = get_latest_file_in_folder(service, folder_id)
+                    if not latest:
+                        raise ValueError("No .xlsx files found in folder.")
+                    download_drive_file_via_api(service, latest["id"], tmp)
+                else:
+                    file_id = extract_drive_file_id(link)
+                    if not file_id:
+                        raise ValueError("Unable to extract file ID from link.")
+                    download_drive_file(file_id, tmp)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
 
             backup = lk.with_name(f"{lk.stem}_backup_{now_stamp()}{lk.suffix}")
             shutil.copy2(lk, backup)
             shutil.move(tmp, lk)
+            return backup
 
+        def done(backup):
+            evict_lookup(lk)
             self.var_status.set("Downloaded.")
             messagebox.showinfo("Done", f"Updated: {lk}\nBackup: {backup}")
             self.on_reload()
 
-        except Exception as e:
+        def failed(e):
             self.var_status.set("Download failed.")
             messagebox.showerror("Error", f"{e}")
 
+        self.var_status.set("Downloading...")
+        self._run_async(do_download, done, failed)
+
     def on_upload(self):
-        lk = Path(self.var_lookup.get())
-        if not lk.exists():
-            messagebox.showerror("Error", "LookupTable path is invalid.")
+        lk = self._validated_lookup_path("LookupTable path is invalid.")
+        if lk is None:
             return
 
         if not self.change_records:
@@ -659,34 +1183,54 @@ class App(tk.Tk):
                 return
 
         try:
-            app_dir = get_app_dir()
-            report_txt = app_dir / f"lookup_upload_{now_stamp()}.txt"
-            report_txt.write_text(format_upload_report(self.change_records, lk), encoding="utf-8")
+            if self.dirty:
+                self._save_session()
+        except Exception as e:
+            self.var_status.set("Upload failed.")
+            messagebox.showerror("Error", f"{e}")
+            return
 
-            self.var_status.set("Uploading...")
-            self.update_idletasks()
+        app_dir = get_app_dir()
+        records = list(self.change_records)
+        progress = {}
+        progress_lock = threading.Lock()  # workers write, Tk thread reads
 
-            service = get_drive_service(app_dir)
-            upload_drive_file(
-                service,
-                lk,
-                DRIVE_PENDING_FOLDER_ID,
-                mime_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            upload_drive_file(
-                service,
-                report_txt,
+        def on_progress(path, frac):
+            with progress_lock:
+                progress[path.name] = frac
+
+        def do_upload():
+            report_txt = app_dir / f"lookup_upload_{now_stamp()}.txt"
+            report_txt.write_text(format_upload_report(records, lk), encoding="utf-8")
+            upload_drive_files(
+                app_dir,
+                [
+                    (lk, XLSX_MIME),
+                    (report_txt, "text/plain"),
+                ],
                 DRIVE_PENDING_FOLDER_ID,
-                mime_type="text/plain",
+                progress=on_progress,
+                service=self._svc(),
             )
 
+        def show_progress():
+            with progress_lock:
+                items = tuple(progress.items())
+            if items:
+                parts = [f"{name} {int(frac * 100)}%" for name, frac in items]
+                self.var_status.set(f"Uploading... {', '.join(parts)}")
+
+        def done(_):
             self.var_status.set("Uploaded.")
             messagebox.showinfo("Done", "LookupTable and report uploaded to Drive.")
 
-        except Exception as e:
+        def failed(e):
             self.var_status.set("Upload failed.")
             messagebox.showerror("Error", f"{e}")
 
+        self.var_status.set("Uploading...")
+        self._run_async(do_upload, done, failed, on_poll=show_progress)
+
 
 def main():
     app = App()
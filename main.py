@@ -25,18 +25,30 @@ BOM Parser (Excel -> Template Derating) - Final All-in-One
 pyinstaller --onefile --windowed --icon app.ico bom_parser_app.py
 """
 
+import os
 import re
 import sys
+import hashlib
+import pickle
+import tempfile
 import argparse
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from collections import defaultdict
 from copy import copy
-from datetime import datetime
+from datetime import date, datetime, time as dtime
+from functools import lru_cache
+from itertools import chain, islice
+from operator import attrgetter
+from typing import NamedTuple
 
 import openpyxl
 from openpyxl.cell.cell import MergedCell
 from openpyxl.formula.translate import Translator
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.utils import get_column_letter, range_boundaries
+from openpyxl.worksheet.merge import MergedCellRange
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
@@ -45,24 +57,38 @@ from tkinter import filedialog, messagebox
 # =========================
 # 기본 유틸
 # =========================
+_RE_REF = re.compile(r"^([A-Z]+)\s*0*([0-9]+)(.*)$")
+_RE_VOLTAGE = re.compile(r"(\d+(?:\.\d+)?)\s*V\b", flags=re.IGNORECASE)
+_RE_SPACES = re.compile(r"\s+")
+_RE_FIELD_NONALNUM = re.compile(r"[^A-Z0-9_]+")
+_RE_FIELD_UNDERSCORES = re.compile(r"_+")
+_NORM_TBL = str.maketrans({"\u00A0": " ", "\u200B": "", "\ufeff": ""})
+
+# 정규화 함수는 같은 셀 값으로 반복 호출되므로 캐시.
+# typed=True: 1 / 1.0 / True가 같은 키로 묶이지 않게(문자열화 결과가 다름)
+_NORM_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=_NORM_CACHE_SIZE, typed=True)
 def normalize_text(v) -> str:
     if v is None:
         return ""
-    s = str(v)
-    s = s.replace("\u00A0", " ").replace("\u200B", "").replace("\ufeff", "")
-    return s.strip()
+    return str(v).translate(_NORM_TBL).strip()
 
 
+@lru_cache(maxsize=_NORM_CACHE_SIZE, typed=True)
 def normalize_category(v) -> str:
     s = normalize_text(v).upper()
-    s = re.sub(r"\s+", "", s)
+    s = _RE_SPACES.sub("", s)
     return s
 
 
+@lru_cache(maxsize=_NORM_CACHE_SIZE, typed=True)
 def normalize_part(v) -> str:
     return normalize_text(v)
 
 
+@lru_cache(maxsize=_NORM_CACHE_SIZE, typed=True)
 def normalize_subcategory(v) -> str:
     s = normalize_text(v)
     if not s:
@@ -81,9 +107,10 @@ def normalize_ref_list(location_value):
     return [p.strip() for p in s.split(",") if p.strip()]
 
 
+@lru_cache(maxsize=_NORM_CACHE_SIZE, typed=True)
 def ref_sort_key(ref):
     s = normalize_text(ref).upper()
-    m = re.match(r"^([A-Z]+)\s*0*([0-9]+)(.*)$", s)
+    m = _RE_REF.match(s)
     if m:
         return (m.group(1), int(m.group(2)), m.group(3).strip())
     return (s, 10**12, "")
@@ -92,7 +119,7 @@ def ref_sort_key(ref):
 def extract_voltage(detail_spec):
     if not detail_spec:
         return ""
-    matches = re.findall(r"(\d+(?:\.\d+)?)\s*V\b", str(detail_spec), flags=re.IGNORECASE)
+    matches = _RE_VOLTAGE.findall(str(detail_spec))
     return f"{matches[-1]}V" if matches else ""
 
 
@@ -103,6 +130,37 @@ def safe_set(ws, r, c, value):
     cell.value = value
 
 
+def iter_value_rows(ws):
+    """(헤더 튜플, 값 행 이터레이터) 반환. read_only 시트는 행 길이가 들쭉날쭉할 수 있어 헤더 폭까지 None으로 채움."""
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, ())
+    width = len(header)
+
+    def body():
+        for row in rows:
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            yield row
+
+    return header, body()
+
+
+def read_header(ws) -> tuple:
+    return tuple(next(ws.iter_rows(max_row=1, values_only=True), ()))
+
+
+def iter_used_rows(ws, col_indexes):
+    """
+    헤더 다음 행부터, 실제로 쓰는 열(0-based col_indexes) 중 마지막 열까지만 읽음.
+    뒤쪽 비고/메모 열은 튜플로 만들지 않음. 짧은 행은 None으로 채움.
+    """
+    width = max(col_indexes) + 1
+    for row in ws.iter_rows(min_row=2, max_col=width, values_only=True):
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        yield row
+
+
 # =========================
 # 실행 폴더(Exe/Script) 기반 자동 감지
 # =========================
@@ -120,89 +178,107 @@ def autodetect_default_files(app_dir: Path):
     """
     app_dir에서 TEMPLATE/LOOKUPTABLE 포함된 xlsx 자동 탐지
     - 여러 개면 "수정시간 최신" 우선
+    - 폴더 스캔(후보 목록)만 폴더 mtime 기준으로 캐시(파일 추가/삭제/이름변경 시에만 다시 스캔).
+      같은 이름으로 덮어쓰면 폴더 mtime은 그대로이므로 후보들의 mtime은 매번 다시 확인
     """
-    template = None
-    lookup = None
+    try:
+        dir_mtime = app_dir.stat().st_mtime_ns
+    except OSError:
+        return None, None
 
-    xlsx = sorted(app_dir.glob("*.xlsx"), key=lambda p: p.stat().st_mtime, reverse=True)
-    for p in xlsx:
-        name_u = p.name.upper()
-        if template is None and "TEMPLATE" in name_u:
-            template = p
-        if lookup is None and "LOOKUPTABLE" in name_u:
-            lookup = p
-        if template and lookup:
-            break
+    newest = {}  # kind -> (mtime, path)
+    for p, kinds in _autodetect_candidates(app_dir, dir_mtime):
+        try:
+            mtime = p.stat().st_mtime
+        except OSError:
+            continue
+        for k in kinds:
+            if k not in newest or mtime > newest[k][0]:
+                newest[k] = (mtime, p)
+
+    template = newest.get("TEMPLATE", (None, None))[1]
+    lookup = newest.get("LOOKUPTABLE", (None, None))[1]
     return template, lookup
 
 
+@lru_cache(maxsize=4)
+def _autodetect_candidates(app_dir: Path, dir_mtime: int):
+    candidates = []  # (path, kinds)
+    for p in app_dir.glob("*.xlsx"):
+        name_u = p.name.upper()
+        kinds = tuple(k for k in ("TEMPLATE", "LOOKUPTABLE") if k in name_u)
+        if kinds:
+            candidates.append((p, kinds))
+    return tuple(candidates)
+
+
 # =========================
 # 템플릿 레이아웃 감지/복사/클리어
 # =========================
-def find_data_start_and_step(ws, scan_rows=300):
+def find_data_start_and_step(ws, merge_index, scan_rows=300):
     """
     Column A에서 값이 1인 최초 행을 레코드 시작으로 보고,
     해당 행이 포함된 merged 범위를 기준으로 레코드 step(행수)를 추정.
     """
     start_row = None
-    for r in range(1, scan_rows + 1):
-        if ws.cell(r, 1).value == 1:
+    # 값만 필요하므로 values_only, 시트 끝(max_row)까지만 스캔 -> 없는 행에 빈 셀을 만들지 않음
+    col_a = ws.iter_rows(min_row=1, max_row=min(scan_rows, ws.max_row), max_col=1, values_only=True)
+    for r, (v,) in enumerate(col_a, start=1):
+        if v == 1:
             start_row = r
             break
     if start_row is None:
         return 6, 1
 
     step = 1
-    for rng in ws.merged_cells.ranges:
-        if rng.min_col <= 1 <= rng.max_col and rng.min_row <= start_row <= rng.max_row:
+    for _, rng in iter_overlapping_merges(merge_index, start_row, start_row):
+        if rng.min_col <= 1 <= rng.max_col:
             if rng.min_col == 1:
                 step = max(step, rng.max_row - rng.min_row + 1)
     return start_row, step
 
 
-def copy_row_with_formula_translate(ws, src_row, dst_row, max_col):
+def snapshot_record_template(ws, template_row, step, max_col):
+    """
+    템플릿 레코드 블록의 셀 스타일/값을 한 번만 읽어 캐시.
+    _style(StyleArray)에 font/border/fill/alignment/protection/number_format id가 모두 들어 있으므로
+    같은 워크북 안에서는 이것만 복사하면 됨.
+    수식은 Translator를 미리 만들어 둠(토큰화는 여기서 1회, 레코드마다는 행/열 이동 계산만).
+    반환: [[(col, style, value, translator|None), ...] (off=0), [...] (off=1), ...]
+    """
+    rows = []
+    for off in range(step):
+        cells = []
+        for c in range(1, max_col + 1):
+            src = ws.cell(template_row + off, c)
+            v = src.value
+            trans = None
+            if isinstance(v, str) and v.startswith("="):
+                trans = Translator(v, origin=src.coordinate)
+            cells.append((c, copy(src._style), v, trans))
+        rows.append(cells)
+    return rows
+
+
+def copy_row_with_formula_translate(ws, template_cells, dst_row):
     """
-    셀 스타일/값/수식을 복사하면서 수식은 행 이동에 맞게 translate.
+    캐시된 템플릿 행(snapshot_record_template)의 스타일/값/수식을 복사하면서 수식은 행 이동에 맞게 translate.
     (병합은 별도 함수로 처리)
     """
-    for c in range(1, max_col + 1):
-        src = ws.cell(src_row, c)
+    for c, style, v, trans in template_cells:
         dst = ws.cell(dst_row, c)
         if isinstance(dst, MergedCell):
             continue
 
-        dst._style = copy(src._style)
-        dst.number_format = src.number_format
-        dst.font = copy(src.font)
-        dst.border = copy(src.border)
-        dst.fill = copy(src.fill)
-        dst.alignment = copy(src.alignment)
-        dst.protection = copy(src.protection)
-
-        v = src.value
-        if isinstance(v, str) and v.startswith("="):
-            dst.value = Translator(v, origin=src.coordinate).translate_formula(dst.coordinate)
+        # StyleArray는 셀마다 따로 가져야 함(이후 셀 스타일 변경이 공유되지 않도록) -> 배열만 얕은 복사
+        dst._style = copy(style)
+
+        if trans is not None:
+            dst.value = trans.translate_formula(dst.coordinate)
         else:
             dst.value = v
 
 
-def clear_records(ws, start_row, step, cols, n_records=1200):
-    """
-    레코드 데이터 영역 값만 clear (template 첫 레코드는 유지)
-    """
-    max_r = ws.max_row
-    for i in range(n_records):
-        r0 = start_row + i * step
-        if r0 > max_r:
-            break
-        for rr in range(r0, min(r0 + step, max_r + 1)):
-            for c in cols:
-                cell = ws.cell(rr, c)
-                if isinstance(cell, MergedCell):
-                    continue
-                cell.value = None
-
-
 def clear_first_record_values(ws, start_row, step, cfg):
     """
     ✅ 특정 시트에 실제 출력할 부품이 0개인 경우,
@@ -220,10 +296,105 @@ def clear_first_record_values(ws, start_row, step, cfg):
             cell.value = None
 
 
+def trim_unused_rows(ws, merge_index, last_row):
+    """
+    last_row 이후 행 삭제. 레코드 영역은 매번 템플릿 레코드로 통째로 덮어쓰므로
+    그 뒤에 남는 템플릿 행(빈 레코드 슬롯/수식 조각)은 지워서 저장량을 줄임.
+    delete_rows는 merge를 옮기지 않으므로 해당 영역의 merge를 먼저 해제.
+    """
+    max_r = ws.max_row
+    if max_r <= last_row:
+        return
+    unmerge_block(ws, merge_index, last_row + 1, max_r - last_row)
+    ws.delete_rows(last_row + 1, max_r - last_row)
+    for r in [r for r in ws.row_dimensions if r > last_row]:
+        del ws.row_dimensions[r]
+    clamp_sheet_refs(ws, last_row)
+
+
+def _clamp_ranges(refs, last_row):
+    """
+    범위 목록(A1:I153 등)의 행을 last_row까지로 자름. 전부 last_row 아래인 범위는 제외.
+    열 전체 참조(A:C)는 행 정보가 없으므로 그대로 둠.
+    """
+    out = []
+    for ref in refs:
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        if min_row is None:
+            out.append(ref)
+            continue
+        if min_row > last_row:
+            continue
+        max_row = min(max_row, last_row)
+        if min_col is None:
+            out.append(f"{min_row}:{max_row}")
+        else:
+            out.append(f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}")
+    return out
+
+
+def clamp_sheet_refs(ws, last_row):
+    """
+    delete_rows는 시트 단위 참조를 고치지 않으므로, 잘라낸 행을 가리키는
+    인쇄 영역/자동 필터/조건부 서식/데이터 유효성 범위를 last_row까지로 줄임
+    (그대로 두면 인쇄 시 빈 페이지가 나옴).
+    """
+    if ws.print_area:
+        refs = [a.rsplit("!", 1)[-1] for a in ws.print_area.split(",")]
+        ws.print_area = _clamp_ranges(refs, last_row) or None
+
+    if ws.auto_filter.ref:
+        clamped = _clamp_ranges([ws.auto_filter.ref], last_row)
+        ws.auto_filter.ref = clamped[0] if clamped else None
+
+    if ws.conditional_formatting:
+        cf_list = ConditionalFormattingList()
+        for cf in ws.conditional_formatting:
+            clamped = _clamp_ranges(str(cf.sqref).split(), last_row)
+            if clamped:
+                for rule in cf.rules:
+                    cf_list.add(" ".join(clamped), rule)
+        ws.conditional_formatting = cf_list
+
+    kept = []
+    for dv in ws.data_validations.dataValidation:
+        clamped = _clamp_ranges(str(dv.sqref).split(), last_row)
+        if clamped:
+            dv.sqref = " ".join(clamped)
+            kept.append(dv)
+    ws.data_validations.dataValidation = kept
+
+
 # =========================
 # ✅ 병합(merge) 복제 지원
 # =========================
-def get_record_merges(ws, start_row, step):
+def build_merge_index(ws):
+    """
+    템플릿 시트의 merge 범위를 min_row 기준으로 정렬해 스냅샷.
+    레코드마다 전체 merge를 훑지 않고 bisect로 해당 블록 후보만 찾기 위함.
+    """
+    ranges = sorted(ws.merged_cells.ranges, key=lambda rng: (rng.min_row, rng.min_col))
+    return {
+        "starts": [rng.min_row for rng in ranges],
+        "ranges": ranges,
+        "span": max((rng.max_row - rng.min_row for rng in ranges), default=0),
+    }
+
+
+def iter_overlapping_merges(merge_index, r0, r1):
+    """
+    인덱스에서 [r0, r1] 행 구간과 겹치는 merge를 (위치, 범위)로 반환.
+    """
+    starts = merge_index["starts"]
+    ranges = merge_index["ranges"]
+    lo = bisect_left(starts, r0 - merge_index["span"])
+    hi = bisect_right(starts, r1)
+    for k in range(lo, hi):
+        if ranges[k].max_row >= r0:
+            yield k, ranges[k]
+
+
+def get_record_merges(merge_index, start_row, step):
     """
     템플릿 레코드(1개 블록) 영역에 포함되는 merge 범위를 수집.
     반환: [(min_row, min_col, max_row, max_col), ...]
@@ -231,9 +402,7 @@ def get_record_merges(ws, start_row, step):
     r0 = start_row
     r1 = start_row + step - 1
     merges = []
-    for rng in ws.merged_cells.ranges:
-        if rng.max_row < r0 or rng.min_row > r1:
-            continue
+    for _, rng in iter_overlapping_merges(merge_index, r0, r1):
         # 레코드 블록 밖으로 걸치는 merge는 블록 복사에서 위험 -> 제외
         if rng.min_row < r0 or rng.max_row > r1:
             continue
@@ -241,73 +410,101 @@ def get_record_merges(ws, start_row, step):
     return merges
 
 
-def unmerge_block(ws, block_start_row, step, max_col=None):
+def unmerge_block(ws, merge_index, block_start_row, step, max_col=None):
     """
-    새 레코드 블록 영역에 걸쳐있는 merge를 모두 해제
+    새 레코드 블록 영역에 걸쳐있는 (템플릿 원본) merge를 모두 해제.
+    해제한 범위는 인덱스에서도 빼서 다시 잡히지 않게 함.
+    ws.unmerge_cells는 문자열 재파싱 + 전체 merge 선형 검사를 하므로,
+    인덱스에 있는 MergedCellRange 객체를 merged_cells 집합에서 직접 제거.
     """
+    # 남은 템플릿 merge가 없거나 블록과 겹치는 것이 없으면 바로 종료
+    if not merge_index["ranges"]:
+        return
     r0 = block_start_row
     r1 = block_start_row + step - 1
-    ranges = list(ws.merged_cells.ranges)
-    for rng in ranges:
-        if rng.max_row < r0 or rng.min_row > r1:
-            continue
+    hits = []
+    for k, rng in iter_overlapping_merges(merge_index, r0, r1):
         if max_col is not None and (rng.min_col > max_col or rng.max_col < 1):
             continue
-        ws.unmerge_cells(str(rng))
+        hits.append(k)
+    if not hits:
+        return
+
+    merged = ws.merged_cells.ranges
+    for k in reversed(hits):
+        rng = merge_index["ranges"].pop(k)
+        del merge_index["starts"][k]
+        merged.discard(rng)
+        cells = rng.cells
+        next(cells)  # 좌상단 셀은 유지
+        for pos in cells:
+            ws._cells.pop(pos, None)
 
 
 def apply_record_merges(ws, template_merges, row_offset):
     """
-    템플릿 레코드 merge들을 row_offset만큼 이동시켜 동일하게 merge 적용
+    템플릿 레코드 merge들을 row_offset만큼 이동시켜 동일하게 merge 적용.
+    대상 영역은 미리 unmerge_block으로 비워 두었으므로 중복 검사 없이 집합에 바로 추가.
     """
+    merged = ws.merged_cells.ranges
     for (min_r, min_c, max_r, max_c) in template_merges:
-        ws.merge_cells(
-            start_row=min_r + row_offset,
-            start_column=min_c,
-            end_row=max_r + row_offset,
-            end_column=max_c
-        )
+        coord = f"{get_column_letter(min_c)}{min_r + row_offset}:{get_column_letter(max_c)}{max_r + row_offset}"
+        mcr = MergedCellRange(ws, coord)
+        merged.add(mcr)
+        ws._clean_merge_range(mcr)
 
 
 # =========================
 # 룩업(Field) 정규화
 # =========================
+_FIELD_SYNONYMS = {
+    "IRATED": "I_RATED",
+    "VRATED": "V_RATED",
+    "IMAX": "I_MAX",
+    "VMAX": "V_MAX",
+    "PMAX": "P_MAX",
+    "PRATED": "P_MAX",
+    "POWERMAX": "P_MAX",
+    "POWERRATED": "P_MAX",
+
+    "VRWM": "VRWM",
+    "VRRM": "V_MAX",
+    "VBRVPT": "VBR_VPT",
+    "VBR_VPT": "VBR_VPT",
+    "VBR": "VBR_VPT",
+
+    "VDDMAX": "V_MAX",
+    "VINMAX": "V_MAX",
+}
+
+
+@lru_cache(maxsize=_NORM_CACHE_SIZE, typed=True)
 def normalize_field(raw_field: str) -> str:
     s = normalize_text(raw_field).upper()
     if not s:
         return ""
-    s = re.sub(r"[^A-Z0-9_]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
+    s = _RE_FIELD_NONALNUM.sub("_", s)
+    s = _RE_FIELD_UNDERSCORES.sub("_", s).strip("_")
     key = s.replace("_", "")
+    return _FIELD_SYNONYMS.get(key, s)
 
-    synonyms = {
-        "IRATED": "I_RATED",
-        "VRATED": "V_RATED",
-        "IMAX": "I_MAX",
-        "VMAX": "V_MAX",
-        "PMAX": "P_MAX",
-        "PRATED": "P_MAX",
-        "POWERMAX": "P_MAX",
-        "POWERRATED": "P_MAX",
-
-        "VRWM": "VRWM",
-        "VRRM": "V_MAX",
-        "VBRVPT": "VBR_VPT",
-        "VBR_VPT": "VBR_VPT",
-        "VBR": "VBR_VPT",
-
-        "VDDMAX": "V_MAX",
-        "VINMAX": "V_MAX",
-    }
-    return synonyms.get(key, s)
 
+class BomItem(NamedTuple):
+    """BOM 1행 x Ref 1개 = 출력 레코드 1개. 중복 Ref/라우팅 리포트도 같은 객체를 공유."""
+    bom_row: int
+    cat: str
+    sub: str
+    ref: str
+    part: str
+    detail: str
+    sheet: str
+    base_sheet: str
 
-@dataclass
-class RatingRec:
-    field: str
-    value: str
-    unit: str
-    priority: int = 1
+
+class PrefixRule(NamedTuple):
+    vendor: str
+    priority: int
+    value_unit: str
 
 
 def format_value_unit(value: str, unit: str) -> str:
@@ -323,44 +520,48 @@ def load_resistor_prefix_rules(lk_wb):
         return {}
 
     ws = lk_wb[RES_PREFIX_SHEET]
-    hdr = {normalize_text(ws.cell(1, c).value): c for c in range(1, ws.max_column + 1)}
+    ws.reset_dimensions()
+    hdr = {normalize_text(v): i for i, v in enumerate(read_header(ws))}
     for req in ["Prefix", "Rating_Value", "Rating_Unit"]:
         if req not in hdr:
             raise ValueError(f"{RES_PREFIX_SHEET} 시트에 필요한 헤더가 없습니다: {req}")
 
     rules = defaultdict(list)
-    has_vendor = "Vendor" in hdr
-    has_priority = "Priority" in hdr
-
-    for r in range(2, ws.max_row + 1):
-        prefix = normalize_text(ws.cell(r, hdr["Prefix"]).value).upper()
+    i_prefix = hdr["Prefix"]
+    i_val = hdr["Rating_Value"]
+    i_unit = hdr["Rating_Unit"]
+    i_vendor = hdr.get("Vendor")
+    i_priority = hdr.get("Priority")
+    used = [i for i in (i_prefix, i_val, i_unit, i_vendor, i_priority) if i is not None]
+
+    for row in iter_used_rows(ws, used):
+        prefix = normalize_text(row[i_prefix]).upper()
         if not prefix:
             continue
 
-        raw_val = ws.cell(r, hdr["Rating_Value"]).value
-        raw_unit = ws.cell(r, hdr["Rating_Unit"]).value
+        raw_val = row[i_val]
+        raw_unit = row[i_unit]
         if raw_val is None and raw_unit is None:
             continue
 
         vendor = ""
-        if has_vendor:
-            vendor = normalize_text(ws.cell(r, hdr["Vendor"]).value).upper()
+        if i_vendor is not None:
+            vendor = normalize_text(row[i_vendor]).upper()
 
         pr = 1
-        if has_priority:
-            pv = ws.cell(r, hdr["Priority"]).value
+        if i_priority is not None:
+            pv = row[i_priority]
             if isinstance(pv, (int, float)):
                 pr = int(pv)
 
-        rules[prefix].append({
-            "vendor": vendor,
-            "priority": pr,
-            "value_unit": format_value_unit(raw_val, raw_unit),
-        })
+        rules[prefix].append(PrefixRule(vendor, pr, format_value_unit(raw_val, raw_unit)))
 
     return rules
 
 
+_PREFIX_RULE_ORDER = attrgetter("priority", "value_unit")
+
+
 def pick_resistor_prefix_rating(part_name: str, prefix_rules: dict) -> str:
     if not prefix_rules:
         return ""
@@ -372,10 +573,12 @@ def pick_resistor_prefix_rating(part_name: str, prefix_rules: dict) -> str:
     if not candidates:
         return ""
 
-    walsin = [c for c in candidates if c["vendor"] == "WALSIN"]
-    pool = walsin if walsin else candidates
-    pool_sorted = sorted(pool, key=lambda x: (x["priority"], x["value_unit"]))
-    return pool_sorted[0]["value_unit"] if pool_sorted else ""
+    pool = candidates
+    if any(c.vendor == "WALSIN" for c in candidates):
+        pool = [c for c in candidates if c.vendor == "WALSIN"]
+    # 최솟값 1개만 필요 -> 정렬 대신 min (동률이면 먼저 나온 후보, sorted와 동일)
+    best = min(pool, key=_PREFIX_RULE_ORDER)
+    return best.value_unit
 
 
 # =========================
@@ -422,7 +625,7 @@ SUGGEST_ALT_FIELDS = {
 }
 
 
-def suggest_alternatives(missing_field: str, available_fields: set) -> list:
+def suggest_alternatives(missing_field: str, available_fields) -> list:
     return [cand for cand in SUGGEST_ALT_FIELDS.get(missing_field, []) if cand in available_fields]
 
 
@@ -438,73 +641,89 @@ def build_connector_spec(rating_map_for_part: dict) -> str:
 # =========================
 # 리포트
 # =========================
-def write_issue_report(report_path: Path, duplicate_refs: dict, rating_issues: list, routed_items: list):
-    lines = []
-    lines.append("=== BOM Parsing Issues Report ===")
-    lines.append(f"- Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    lines.append(f"- Report file: {report_path.name}")
-    lines.append("")
+def iter_issue_report_lines(report_path: Path, duplicate_refs: dict, rating_issues: list, routed_items: list):
+    yield "=== BOM Parsing Issues Report ==="
+    yield f"- Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    yield f"- Report file: {report_path.name}"
+    yield ""
 
-    lines.append("[0] Routing Hits (기본 시트가 아닌 다른 시트로 라우팅된 항목)")
+    yield "[0] Routing Hits (기본 시트가 아닌 다른 시트로 라우팅된 항목)"
     if not routed_items:
-        lines.append("  - None")
+        yield "  - None"
     else:
-        for it in sorted(routed_items, key=lambda x: ref_sort_key(x["ref"])):
-            lines.append(
-                f"  - Ref={it['ref']}, Part={it['part']}, Category={it['cat']}, Subcategory={it['sub'] or '(blank)'}"
+        for it in sorted(routed_items, key=lambda x: ref_sort_key(x.ref)):
+            yield (
+                f"  - Ref={it.ref}, Part={it.part}, Category={it.cat}, Subcategory={it.sub or '(blank)'}"
             )
-            lines.append(
-                f"      BOM_row={it['bom_row']}, BaseSheet={it['base_sheet']} -> TargetSheet={it['sheet']}"
+            yield (
+                f"      BOM_row={it.bom_row}, BaseSheet={it.base_sheet} -> TargetSheet={it.sheet}"
             )
-    lines.append("")
+    yield ""
 
-    lines.append("[1] Duplicate References (중복 Ref)")
+    yield "[1] Duplicate References (중복 Ref)"
     if not duplicate_refs:
-        lines.append("  - None")
+        yield "  - None"
     else:
         for ref in sorted(duplicate_refs.keys(), key=ref_sort_key):
             occs = duplicate_refs[ref]
-            lines.append(f"  - {ref} (count={len(occs)})")
+            yield f"  - {ref} (count={len(occs)})"
             for o in occs:
-                lines.append(
-                    f"      * BOM_row={o['bom_row']}, Category={o['cat']}, Subcategory={o['sub'] or '(blank)'}"
-                    f", Part={o['part']}, TargetSheet={o['sheet']}"
+                yield (
+                    f"      * BOM_row={o.bom_row}, Category={o.cat}, Subcategory={o.sub or '(blank)'}"
+                    f", Part={o.part}, TargetSheet={o.sheet}"
                 )
-    lines.append("")
+    yield ""
 
-    lines.append("[2] Missing Ratings (정격값 공란/부분 공란) + Suggestions")
+    yield "[2] Missing Ratings (정격값 공란/부분 공란) + Suggestions"
     if not rating_issues:
-        lines.append("  - None")
+        yield "  - None"
     else:
         for it in rating_issues:
             miss = ", ".join(it["missing_fields"]) if it["missing_fields"] else "(unknown)"
-            lines.append(
+            yield (
                 f"  - Sheet={it['sheet']}, Ref={it['ref']}, Part={it['part']}, "
                 f"Category={it['cat']}, Subcategory={it['sub'] or '(blank)'}, BOM_row={it['bom_row']}"
             )
-            lines.append(f"      MissingFields: {miss}")
-            lines.append(f"      LookupHasAnyRatingForPart: {it['lookup_has_any']}")
+            yield f"      MissingFields: {miss}"
+            yield f"      LookupHasAnyRatingForPart: {it['lookup_has_any']}"
             if it["lookup_has_any"]:
-                lines.append(f"      AvailableCanonicalFields: {', '.join(sorted(it['available_fields'])) or '(none)'}")
+                yield f"      AvailableCanonicalFields: {', '.join(sorted(it['available_fields'])) or '(none)'}"
                 if it.get("available_raw_fields"):
-                    lines.append(f"      AvailableRawFields: {', '.join(sorted(it['available_raw_fields']))}")
+                    yield f"      AvailableRawFields: {', '.join(sorted(it['available_raw_fields']))}"
                 for mf in it["missing_fields"]:
                     alts = it.get("suggestions", {}).get(mf, [])
                     if alts:
-                        lines.append(f"      SuggestFor[{mf}]: use {', '.join(alts)} (if acceptable)")
-            lines.append("")
-    report_path.write_text("\n".join(lines), encoding="utf-8")
+                        yield f"      SuggestFor[{mf}]: use {', '.join(alts)} (if acceptable)"
+            yield ""
+
+
+_REPORT_WRITE_BATCH = 4096
 
 
-def write_unclassified_sheet(tpl_wb, ws_bom, unclassified_rows, sheet_name: str):
+def write_issue_report(report_path: Path, duplicate_refs: dict, rating_issues: list, routed_items: list):
+    """
+    리포트를 _REPORT_WRITE_BATCH 줄씩 join 해서 한 번에 write (줄마다 write 호출하지 않음).
+    전체를 한 문자열로 만들지 않으므로 메모리는 배치 크기로 제한. 줄 사이에만 개행(기존 출력과 동일).
+    """
+    lines = iter_issue_report_lines(report_path, duplicate_refs, rating_issues, routed_items)
+    with report_path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+        sep = ""
+        while True:
+            batch = list(islice(lines, _REPORT_WRITE_BATCH))
+            if not batch:
+                break
+            f.write(sep + "\n".join(batch))
+            sep = "\n"
+
+
+def write_unclassified_sheet(tpl_wb, bom_header, unclassified_rows, sheet_name: str):
     if sheet_name in tpl_wb.sheetnames:
         ws = tpl_wb[sheet_name]
     else:
         ws = tpl_wb.create_sheet(sheet_name)
 
-    max_col = ws_bom.max_column
-    for c in range(1, max_col + 1):
-        ws.cell(1, c).value = ws_bom.cell(1, c).value
+    for c, val in enumerate(bom_header, start=1):
+        ws.cell(1, c).value = val
 
     if ws.max_row > 1:
         ws.delete_rows(2, ws.max_row - 1)
@@ -515,20 +734,199 @@ def write_unclassified_sheet(tpl_wb, ws_bom, unclassified_rows, sheet_name: str)
             ws.cell(i, c).value = val
 
 
+# =========================
+# 값 읽기 엔진 (openpyxl read_only 기본 / python-calamine 선택)
+# =========================
+READ_ENGINES = ("openpyxl", "calamine")
+
+
+def calamine_available() -> bool:
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _calamine_value(v):
+    """calamine 값을 openpyxl(data_only) 값과 같은 형태로: 빈칸 -> None, 정수 float -> int, date -> datetime."""
+    if isinstance(v, str):
+        return v if v != "" else None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if isinstance(v, date) and not isinstance(v, datetime):
+        return datetime.combine(v, dtime())
+    return v
+
+
+class _CalamineSheet:
+    """run_parser가 쓰는 read_only 워크시트 API(iter_rows/reset_dimensions)만 흉내내는 어댑터."""
+
+    def __init__(self, sheet):
+        self.title = sheet.name
+        self._sheet = sheet
+        # calamine iter_rows의 열은 항상 첫 사용 열부터 시작 -> 앞쪽 빈 열을 채움.
+        # 행은 버전에 따라 1행부터(앞쪽 빈 행을 빈 행으로 채움, 0.8.x) 또는 첫 사용 행부터 줌 -> iter_rows에서 판별
+        self._col_pad = [None] * (sheet.start[1] if sheet.start else 0)
+        self._row_pad = sheet.start[0] if sheet.start else 0
+
+    def reset_dimensions(self):
+        pass
+
+    def iter_rows(self, min_row=1, max_row=None, max_col=None, values_only=True):
+        # 시트 전체를 파이썬 리스트로 만들지 않고 한 행씩 변환(대용량 BOM 메모리 = 행 1개분)
+        raw_rows = self._sheet.iter_rows()
+        first_r = 1
+        if self._row_pad:
+            # 사용 범위 첫 행에는 값이 있으므로, 첫 행이 비어 있지 않으면 앞쪽 빈 행을 주지 않는 버전
+            first = next(raw_rows, None)
+            if first is None:
+                return
+            if any(v != "" for v in first):
+                # 앞쪽 빈 행은 빈 튜플로 채워서 openpyxl과 같은 행 번호/행 수로 맞춤
+                first_r = self._row_pad + 1
+                for _ in range(min_row, min(first_r, max_row + 1 if max_row is not None else first_r)):
+                    yield ()
+            raw_rows = chain((first,), raw_rows)
+        for r, raw in enumerate(raw_rows, start=first_r):
+            if r < min_row:
+                continue
+            if max_row is not None and r > max_row:
+                break
+            row = self._col_pad + [_calamine_value(v) for v in raw]
+            if max_col is not None:
+                del row[max_col:]
+            while row and row[-1] is None:
+                row.pop()
+            yield tuple(row)
+
+
+class _CalamineBook:
+    """
+    openpyxl read_only 워크북 대용(sheetnames/[]/active/close).
+    calamine은 활성 탭 정보를 주지 않으므로 active는 첫 번째 시트.
+    """
+
+    def __init__(self, path: Path):
+        from python_calamine import CalamineWorkbook
+
+        self._wb = CalamineWorkbook.from_path(str(path))
+        self.sheetnames = list(self._wb.sheet_names)
+        self._sheets = {}
+
+    def __getitem__(self, name):
+        if name not in self._sheets:
+            self._sheets[name] = _CalamineSheet(self._wb.get_sheet_by_name(name))
+        return self._sheets[name]
+
+    @property
+    def active(self):
+        return self[self.sheetnames[0]]
+
+    def close(self):
+        self._wb.close()
+
+
+def open_values_workbook(path: Path, engine: str = "openpyxl"):
+    """
+    값만 읽는 입력(BOM/룩업) 열기.
+    engine="calamine"이고 python-calamine이 설치돼 있으면 Rust 파서 사용, 아니면 openpyxl read_only로 대체.
+    읽기 전용(read_only): 스타일을 만들지 않고 셀을 스트리밍. 차원 태그는 신뢰하지 않음
+    keep_links=False: 외부 링크 캐시 파트는 읽지 않음(값만 필요)
+    """
+    if engine == "calamine" and calamine_available():
+        return _CalamineBook(path)
+    return openpyxl.load_workbook(path, data_only=True, read_only=True, keep_links=False)
+
+
 # =========================
 # 파서 실행
 # =========================
-def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx: Path, out_txt: Path):
-    # --- lookup ---
-    lk_wb = openpyxl.load_workbook(lookup_path, data_only=True)
+def load_lookup(lookup_path: Path, engine: str = "openpyxl") -> dict:
+    """
+    룩업테이블 xlsx를 한 번만 열어 TABLE/ROUTING_RULES/RESISTOR_PREFIX를 모두 읽고, 예외가 나도 반드시 닫음.
+    """
+    lk_wb = open_values_workbook(lookup_path, engine)
+    try:
+        return _read_lookup(lk_wb)
+    finally:
+        lk_wb.close()
+
+
+# 파싱된 룩업 캐시: 룩업 파일 1개당 pkl 1개, 파일 mtime/size가 바뀌면 다시 파싱
+# 끄려면 --no-lookup-cache 또는 환경변수 BOM_PARSER_NO_LOOKUP_CACHE=1
+_LOOKUP_CACHE_DIR = Path.home() / ".cache" / "bom_parser"
+_LOOKUP_CACHE_VERSION = 1  # 룩업 dict 구조를 바꾸면 올릴 것
+_LOOKUP_CACHE_ENV_OFF = "BOM_PARSER_NO_LOOKUP_CACHE"
+# 깨진/다른 버전 캐시 파일을 읽을 때 날 수 있는 예외(모듈 이름이 다르면 클래스를 못 찾음 -> Attribute/ImportError)
+_CACHE_READ_ERRORS = (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError)
+_CACHE_WRITE_ERRORS = (OSError, pickle.PicklingError, AttributeError, TypeError)
+
+
+def lookup_cache_enabled() -> bool:
+    return os.environ.get(_LOOKUP_CACHE_ENV_OFF, "").strip() in ("", "0")
+
+
+def _unlink_quietly(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def load_lookup_cached(lookup_path: Path, engine: str = "openpyxl", use_cache: bool = True) -> dict:
+    """
+    load_lookup 결과를 pickle로 캐시. 캐시를 읽거나 쓰지 못하면 그냥 xlsx를 파싱.
+    stamp가 맞지 않거나 읽을 수 없는 캐시 파일은 지움(다시 쓰지 못해도 남지 않도록).
+    """
+    if not use_cache or not lookup_cache_enabled():
+        return load_lookup(lookup_path, engine)
+    try:
+        resolved = lookup_path.resolve()
+        st = resolved.stat()
+    except OSError:
+        return load_lookup(lookup_path, engine)
+
+    stamp = (_LOOKUP_CACHE_VERSION, str(resolved), st.st_mtime_ns, st.st_size, engine)
+    cache_path = _LOOKUP_CACHE_DIR / f"lookup_{hashlib.sha1(str(resolved).encode('utf-8')).hexdigest()}.pkl"
+
+    if cache_path.exists():
+        try:
+            with cache_path.open("rb") as f:
+                cached = pickle.load(f)
+            if isinstance(cached, dict) and cached.get("stamp") == stamp:
+                return cached["lookup"]
+        except _CACHE_READ_ERRORS:
+            pass
+        _unlink_quietly(cache_path)
+
+    lookup = load_lookup(lookup_path, engine)
+    tmp_path = None
+    try:
+        _LOOKUP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # 프로세스마다 고유한 임시 파일에 쓴 뒤 replace (GUI+CLI 동시 실행 시 서로 덮어쓰지 않도록)
+        with tempfile.NamedTemporaryFile(dir=_LOOKUP_CACHE_DIR, prefix=cache_path.stem + "_",
+                                         suffix=".tmp", delete=False) as f:
+            tmp_path = Path(f.name)
+            pickle.dump({"stamp": stamp, "lookup": lookup}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except _CACHE_WRITE_ERRORS:
+        if tmp_path is not None:
+            _unlink_quietly(tmp_path)
+    return lookup
+
+
+def _read_lookup(lk_wb) -> dict:
     if "TABLE" not in lk_wb.sheetnames or "ROUTING_RULES" not in lk_wb.sheetnames:
         raise ValueError("룩업테이블에는 'TABLE'과 'ROUTING_RULES' 시트가 필요합니다.")
 
     ws_table = lk_wb["TABLE"]
     ws_rules = lk_wb["ROUTING_RULES"]
+    ws_table.reset_dimensions()
+    ws_rules.reset_dimensions()
 
-    table_hdr = {normalize_text(ws_table.cell(1, c).value): c for c in range(1, ws_table.max_column + 1)}
-    rules_hdr = {normalize_text(ws_rules.cell(1, c).value): c for c in range(1, ws_rules.max_column + 1)}
+    table_hdr = {normalize_text(v): i for i, v in enumerate(read_header(ws_table))}
+    rules_hdr = {normalize_text(v): i for i, v in enumerate(read_header(ws_rules))}
 
     for req in ["Category", "Subcategory", "Part_Name", "Rating_Field", "Rating_Value", "Rating_Unit"]:
         if req not in table_hdr:
@@ -537,26 +935,30 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
         if req not in rules_hdr:
             raise ValueError(f"ROUTING_RULES에 필요한 헤더가 없습니다: {req}")
 
-    ratings = defaultdict(list)
+    rating_best = defaultdict(dict)
     subcat_map = {}
     raw_field_map = defaultdict(set)
     part_to_cats = defaultdict(set)
-    has_priority = "Priority" in table_hdr
-
-    for r in range(2, ws_table.max_row + 1):
-        cat = normalize_category(ws_table.cell(r, table_hdr["Category"]).value)
-        sub = normalize_subcategory(ws_table.cell(r, table_hdr["Subcategory"]).value)
-        part = normalize_part(ws_table.cell(r, table_hdr["Part_Name"]).value)
-
-        raw_field = ws_table.cell(r, table_hdr["Rating_Field"]).value
+    i_cat, i_sub, i_part, i_field, i_val, i_unit = (
+        table_hdr[k] for k in ["Category", "Subcategory", "Part_Name", "Rating_Field", "Rating_Value", "Rating_Unit"]
+    )
+    i_priority = table_hdr.get("Priority")
+    used = [i_cat, i_sub, i_part, i_field, i_val, i_unit] + ([i_priority] if i_priority is not None else [])
+
+    # 반복되는 원본값은 정규화 함수의 lru_cache가 재사용하므로 행 단위로 바로 처리
+    for row in iter_used_rows(ws_table, used):
+        cat = normalize_category(row[i_cat])
+        sub = normalize_subcategory(row[i_sub])
+        part = normalize_part(row[i_part])
+        raw_field = row[i_field]
         field = normalize_field(raw_field)
 
-        raw_val = ws_table.cell(r, table_hdr["Rating_Value"]).value
-        raw_unit = ws_table.cell(r, table_hdr["Rating_Unit"]).value
+        raw_val = row[i_val]
+        raw_unit = row[i_unit]
 
         pr = 1
-        if has_priority:
-            pv = ws_table.cell(r, table_hdr["Priority"]).value
+        if i_priority is not None:
+            pv = row[i_priority]
             if isinstance(pv, (int, float)):
                 pr = int(pv)
 
@@ -571,47 +973,82 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
             raw_field_map[key].add(normalize_text(raw_field))
 
         if field:
-            val = "" if raw_val is None else str(raw_val).strip()
-            unit = normalize_text(raw_unit)
-            ratings[key].append(RatingRec(field=field, value=val, unit=unit, priority=pr))
+            # 같은 field는 Priority가 가장 낮은 값만 유지(동률이면 먼저 나온 행)
+            cur = rating_best[key].get(field)
+            if cur is None or cur[0] > pr:
+                val = "" if raw_val is None else str(raw_val).strip()
+                rating_best[key][field] = (pr, format_value_unit(val, raw_unit))
 
     routing = {}
-    for r in range(2, ws_rules.max_row + 1):
-        cat = normalize_category(ws_rules.cell(r, rules_hdr["Category"]).value)
-        sub = normalize_subcategory(ws_rules.cell(r, rules_hdr["Subcategory"]).value)
-        out_sheet = normalize_text(ws_rules.cell(r, rules_hdr["Output_Sheet"]).value)
+    r_cat, r_sub, r_out = (rules_hdr[k] for k in ["Category", "Subcategory", "Output_Sheet"])
+    for row in iter_used_rows(ws_rules, [r_cat, r_sub, r_out]):
+        cat = normalize_category(row[r_cat])
+        sub = normalize_subcategory(row[r_sub])
+        out_sheet = normalize_text(row[r_out])
         if cat and out_sheet:
             routing[(cat, sub)] = out_sheet
 
-    rating_map = defaultdict(dict)
-    for key, recs in ratings.items():
-        recs_sorted = sorted(recs, key=lambda x: (x.priority, x.field))
-        for rec in recs_sorted:
-            if rec.field in rating_map[key]:
-                continue
-            rating_map[key][rec.field] = format_value_unit(rec.value, rec.unit)
+    rating_map = {
+        key: {field: value for field, (_, value) in fields.items()}
+        for key, fields in rating_best.items()
+    }
 
-    resistor_prefix_rules = load_resistor_prefix_rules(lk_wb)
+    return {
+        "rating_map": rating_map,
+        "subcat_map": subcat_map,
+        "raw_field_map": raw_field_map,
+        "part_to_cats": part_to_cats,
+        "routing": routing,
+        "resistor_prefix_rules": load_resistor_prefix_rules(lk_wb),
+    }
+
+
+def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx: Path, out_txt: Path,
+               engine: str = "openpyxl", threads: int = 1, lookup_cache: bool = True):
+    # --- lookup / template ---
+    # 서로 독립적인 두 파일이므로 threads > 1이면 동시에 로드(zip 해제/파일 IO 구간이 겹침)
+    # 동시에 읽을 파일이 2개뿐이라 워커는 최대 2개
+    if threads < 1:
+        raise ValueError(f"threads는 1 이상이어야 합니다: {threads}")
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=min(threads, 2)) as ex:
+            f_lookup = ex.submit(load_lookup_cached, lookup_path, engine, lookup_cache)
+            f_tpl = ex.submit(openpyxl.load_workbook, template_path)
+            lookup = f_lookup.result()
+            tpl_wb = f_tpl.result()
+    else:
+        lookup = load_lookup_cached(lookup_path, engine, lookup_cache)
+        tpl_wb = openpyxl.load_workbook(template_path)
+
+    rating_map = lookup["rating_map"]
+    subcat_map = lookup["subcat_map"]
+    raw_field_map = lookup["raw_field_map"]
+    part_to_cats = lookup["part_to_cats"]
+    routing = lookup["routing"]
+    resistor_prefix_rules = lookup["resistor_prefix_rules"]
+    resistor_prefix_pick = {}  # 품번 -> 접두어 규칙 정격값 (실행 단위 메모)
 
-    # --- template ---
-    tpl_wb = openpyxl.load_workbook(template_path)
     for s in MANAGED_SHEETS:
         if s not in tpl_wb.sheetnames:
             raise ValueError(f"템플릿에 시트가 없습니다: '{s}'")
 
     layouts = {}
     record_merges = {}
+    merge_indexes = {}
     for s in MANAGED_SHEETS:
         ws = tpl_wb[s]
-        start_row, step = find_data_start_and_step(ws)
+        merge_indexes[s] = build_merge_index(ws)
+        start_row, step = find_data_start_and_step(ws, merge_indexes[s])
         layouts[s] = (start_row, step)
-        record_merges[s] = get_record_merges(ws, start_row, step)
+        record_merges[s] = get_record_merges(merge_indexes[s], start_row, step)
 
     # --- BOM ---
-    wb_bom = openpyxl.load_workbook(bom_path, data_only=True)
+    wb_bom = open_values_workbook(bom_path, engine)
     ws_bom = wb_bom.active
+    ws_bom.reset_dimensions()
 
-    bom_hdr = {normalize_text(ws_bom.cell(1, c).value): c for c in range(1, ws_bom.max_column + 1)}
+    bom_header, bom_rows = iter_value_rows(ws_bom)
+    bom_hdr = {normalize_text(v): i for i, v in enumerate(bom_header)}
     for req in ["품목명", "분류체계", "세부규격", "Location"]:
         if req not in bom_hdr:
             raise ValueError(f"BOM에 필요한 헤더가 없습니다: {req}")
@@ -633,15 +1070,17 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
 
     out_groups = defaultdict(list)
     ignored = defaultdict(int)
-    ref_occurrences = defaultdict(list)
+    # 중복 Ref 추적: 대부분 Ref는 1회뿐이므로 첫 등장만 기억하고, 두 번째부터 목록 생성
+    ref_first_seen = {}
+    duplicate_refs = {}
     routed_items = []
     unclassified_rows = []
 
-    for r in range(2, ws_bom.max_row + 1):
-        raw_cat = ws_bom.cell(r, col_cls).value
-        raw_part = ws_bom.cell(r, col_part).value
-        raw_detail = ws_bom.cell(r, col_detail).value
-        raw_loc = ws_bom.cell(r, col_loc).value
+    for r, row in enumerate(bom_rows, start=2):
+        raw_cat = row[col_cls]
+        raw_part = row[col_part]
+        raw_detail = row[col_detail]
+        raw_loc = row[col_loc]
 
         if raw_cat is None and raw_part is None and raw_detail is None and raw_loc is None:
             continue
@@ -660,10 +1099,8 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
             if len(candidates) == 1:
                 cat = candidates[0]
 
-        row_values = [ws_bom.cell(r, c).value for c in range(1, ws_bom.max_column + 1)]
-
         if not cat or cat not in base_cat_to_sheet:
-            unclassified_rows.append({"bom_row": r, "values": row_values})
+            unclassified_rows.append({"bom_row": r, "values": list(row)})
             continue
 
         base_sheet = base_cat_to_sheet[cat]
@@ -671,99 +1108,71 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
         sheet = routing.get((cat, sub), routing.get((cat, ""), base_sheet))
 
         if sheet not in MANAGED_SHEETS:
-            unclassified_rows.append({"bom_row": r, "values": row_values})
+            unclassified_rows.append({"bom_row": r, "values": list(row)})
             continue
 
         for ref in normalize_ref_list(raw_loc):
-            item = {
-                "bom_row": r,
-                "cat": cat,
-                "sub": sub,
-                "ref": ref,
-                "part": part,
-                "detail": detail,
-                "sheet": sheet,
-                "base_sheet": base_sheet,
-            }
+            item = BomItem(r, cat, sub, ref, part, detail, sheet, base_sheet)
             out_groups[sheet].append(item)
 
-            ref_occurrences[ref].append({
-                "bom_row": r,
-                "cat": cat,
-                "sub": sub,
-                "part": part,
-                "sheet": sheet,
-            })
+            if ref in duplicate_refs:
+                duplicate_refs[ref].append(item)
+            elif ref in ref_first_seen:
+                duplicate_refs[ref] = [ref_first_seen.pop(ref), item]
+            else:
+                ref_first_seen[ref] = item
 
             if sheet != base_sheet:
-                routed_items.append({
-                    "bom_row": r,
-                    "cat": cat,
-                    "sub": sub,
-                    "ref": ref,
-                    "part": part,
-                    "sheet": sheet,
-                    "base_sheet": base_sheet,
-                })
-
-    duplicate_refs = {ref: occs for ref, occs in ref_occurrences.items() if len(occs) > 1}
-
-    # --- clear template data area (keep first record) ---
-    for sheet_name in MANAGED_SHEETS:
-        ws = tpl_wb[sheet_name]
-        start_row, step = layouts[sheet_name]
-        cfg = SHEET_CFG[sheet_name]
-
-        cols_to_clear = {1, 2, 3, cfg["spec_col"], cfg["actual_col"]}
-        if cfg.get("detail_col"):
-            cols_to_clear.add(cfg["detail_col"])
-
-        clear_from = start_row + step
-        clear_records(ws, clear_from, step, cols=sorted(cols_to_clear), n_records=1200)
+                routed_items.append(item)
+    wb_bom.close()
 
     # --- write + rating issues ---
     rating_issues = []
+    populated_sheets = set()
 
     for sheet_name, items in out_groups.items():
+        populated_sheets.add(sheet_name)
         ws = tpl_wb[sheet_name]
         start_row, step = layouts[sheet_name]
         cfg = SHEET_CFG[sheet_name]
         max_col = ws.max_column
 
-        items.sort(key=lambda x: ref_sort_key(x["ref"]))
+        items.sort(key=lambda x: ref_sort_key(x.ref))
         template_row = start_row
+        template_cells = snapshot_record_template(ws, template_row, step, max_col)
+
+        # ✅ 병합 복제: 해제(전체 레코드 영역 1회) -> 레코드별 복사 -> 병합 적용
+        unmerge_block(ws, merge_indexes[sheet_name], start_row, step * len(items), max_col=max_col)
 
         for i, item in enumerate(items, start=1):
             record_start = start_row + (i - 1) * step
 
-            # ✅ 병합 복제: 해제 -> 복사 -> 병합 적용
-            unmerge_block(ws, record_start, step, max_col=max_col)
-
             for off in range(step):
-                copy_row_with_formula_translate(ws, template_row + off, record_start + off, max_col=max_col)
+                copy_row_with_formula_translate(ws, template_cells[off], record_start + off)
 
             row_offset = record_start - template_row
             apply_record_merges(ws, record_merges[sheet_name], row_offset)
 
             # 기본 값 기입
             safe_set(ws, record_start, 1, i)
-            safe_set(ws, record_start, 2, item["ref"])
-            safe_set(ws, record_start, 3, item["part"])
+            safe_set(ws, record_start, 2, item.ref)
+            safe_set(ws, record_start, 3, item.part)
             if cfg.get("detail_col"):
-                safe_set(ws, record_start, cfg["detail_col"], item["detail"])
+                safe_set(ws, record_start, cfg["detail_col"], item.detail)
             safe_set(ws, record_start, cfg["actual_col"], None)
 
             # 정격값 채우기
-            cat = item["cat"]
-            part = item["part"]
+            cat = item.cat
+            part = item.part
             part_ratings = rating_map.get((cat, part), {})
             lookup_has_any = bool(part_ratings)
-            available_fields = set(part_ratings.keys())
+            # 룩업 dict를 그대로 조회(레코드마다 set 복사하지 않음): keys 뷰로 in/sorted 모두 가능
+            available_fields = part_ratings.keys()
             available_raw_fields = raw_field_map.get((cat, part), set())
 
             # Capacitor: 세부규격에서 전압 추출(우선), 없으면 룩업
             if sheet_name == "Capacitor":
-                cap_v = extract_voltage(item["detail"])
+                cap_v = extract_voltage(item.detail)
                 if cap_v:
                     safe_set(ws, record_start, cfg["spec_col"], cap_v)
                 else:
@@ -776,11 +1185,11 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
                     if not spec_one:
                         rating_issues.append({
                             "sheet": sheet_name,
-                            "ref": item["ref"],
+                            "ref": item.ref,
                             "part": part,
                             "cat": cat,
-                            "sub": item["sub"],
-                            "bom_row": item["bom_row"],
+                            "sub": item.sub,
+                            "bom_row": item.bom_row,
                             "missing_fields": ["(CAP_VOLTAGE)"],
                             "lookup_has_any": lookup_has_any,
                             "available_fields": sorted(available_fields),
@@ -798,11 +1207,11 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
                 if not i_present:
                     rating_issues.append({
                         "sheet": sheet_name,
-                        "ref": item["ref"],
+                        "ref": item.ref,
                         "part": part,
                         "cat": cat,
-                        "sub": item["sub"],
-                        "bom_row": item["bom_row"],
+                        "sub": item.sub,
+                        "bom_row": item.bom_row,
                         "missing_fields": ["I_RATED/I_MAX"],
                         "lookup_has_any": lookup_has_any,
                         "available_fields": sorted(available_fields),
@@ -813,7 +1222,10 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
 
             # 슬롯 규칙(여러 행에 정격값 순서대로 기입)
             if sheet_name == "Resistor":
-                spec_one = pick_resistor_prefix_rating(part, resistor_prefix_rules)
+                # 품번별 접두어 규칙 결과는 한 번만 계산 (같은 품번의 ref끼리 공유)
+                spec_one = resistor_prefix_pick.get(part)
+                if spec_one is None:
+                    spec_one = resistor_prefix_pick[part] = pick_resistor_prefix_rating(part, resistor_prefix_rules)
                 if not spec_one:
                     for f in FIELD_ORDER_BY_CATEGORY.get(cat, []):
                         if f in part_ratings and part_ratings[f]:
@@ -831,11 +1243,11 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
 
                     rating_issues.append({
                         "sheet": sheet_name,
-                        "ref": item["ref"],
+                        "ref": item.ref,
                         "part": part,
                         "cat": cat,
-                        "sub": item["sub"],
-                        "bom_row": item["bom_row"],
+                        "sub": item.sub,
+                        "bom_row": item.bom_row,
                         "missing_fields": ["(NO_MATCHED_FIELD)"],
                         "lookup_has_any": lookup_has_any,
                         "available_fields": sorted(available_fields),
@@ -866,11 +1278,11 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
                 if missing:
                     rating_issues.append({
                         "sheet": sheet_name,
-                        "ref": item["ref"],
+                        "ref": item.ref,
                         "part": part,
                         "cat": cat,
-                        "sub": item["sub"],
-                        "bom_row": item["bom_row"],
+                        "sub": item.sub,
+                        "bom_row": item.bom_row,
                         "missing_fields": missing,
                         "lookup_has_any": lookup_has_any,
                         "available_fields": sorted(available_fields),
@@ -897,11 +1309,11 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
 
                 rating_issues.append({
                     "sheet": sheet_name,
-                    "ref": item["ref"],
+                    "ref": item.ref,
                     "part": part,
                     "cat": cat,
-                    "sub": item["sub"],
-                    "bom_row": item["bom_row"],
+                    "sub": item.sub,
+                    "bom_row": item.bom_row,
                     "missing_fields": ["(NO_MATCHED_FIELD)"],
                     "lookup_has_any": lookup_has_any,
                     "available_fields": sorted(available_fields),
@@ -910,15 +1322,17 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
                 })
 
     # ✅ [추가] 해당 시트에 부품이 0개면 템플릿 예시(첫 레코드) 값을 공란 처리
+    # 마지막 레코드 뒤의 템플릿 잔여 행(빈 슬롯/수식 조각)은 삭제
     for sheet_name in MANAGED_SHEETS:
-        if len(out_groups.get(sheet_name, [])) == 0:
-            ws = tpl_wb[sheet_name]
-            start_row, step = layouts[sheet_name]
-            cfg = SHEET_CFG[sheet_name]
-            clear_first_record_values(ws, start_row, step, cfg)
+        ws = tpl_wb[sheet_name]
+        start_row, step = layouts[sheet_name]
+        if sheet_name not in populated_sheets:
+            clear_first_record_values(ws, start_row, step, SHEET_CFG[sheet_name])
+        n_records = max(len(out_groups.get(sheet_name, [])), 1)
+        trim_unused_rows(ws, merge_indexes[sheet_name], start_row + n_records * step - 1)
 
     if unclassified_rows:
-        write_unclassified_sheet(tpl_wb, ws_bom, unclassified_rows, UNCLASS_SHEET)
+        write_unclassified_sheet(tpl_wb, bom_header, unclassified_rows, UNCLASS_SHEET)
 
     tpl_wb.save(out_xlsx)
     write_issue_report(out_txt, duplicate_refs, rating_issues, routed_items)
@@ -934,6 +1348,9 @@ def run_parser(bom_path: Path, template_path: Path, lookup_path: Path, out_xlsx:
 # =========================
 # GUI (한 화면)
 # =========================
+_XLSX_FILETYPES = (("Excel files", "*.xlsx"),)
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -947,12 +1364,27 @@ class App(tk.Tk):
         self.var_outdir = tk.StringVar()
         self.var_status = tk.StringVar(value="Ready.")
 
+        # 실행 폴더는 세션 동안 바뀌지 않으므로 한 번만 계산 (자동 감지 프리필에 재사용)
+        self.app_dir = get_app_dir()
+
+        # 파싱은 워커 스레드 1개에서 실행(Tk 메인 스레드가 멈추지 않도록), 완료는 after()로 폴링
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._poll_id = None  # 대기 중인 _poll_run after() id (창 닫을 때 취소)
+        # 경로 문자열 -> 파일 존재 확인 결과(존재하는 경우만 캐시). Browse로 바꾸면 해당 항목 무효화
+        self._exist_cache = {}
+        # 이번 세션에 이미 만든(확인한) 출력 폴더. 실행이 실패하면 해당 폴더는 다시 확인
+        self._mkdir_done = set()
+
         pad = {"padx": 10, "pady": 6}
 
-        self._row_file("BOM (.xlsx)", self.var_bom, self.browse_bom, 0, **pad)
-        self._row_file("Template (.xlsx)", self.var_template, self.browse_template, 1, **pad)
-        self._row_file("LookupTable (.xlsx)", self.var_lookup, self.browse_lookup, 2, **pad)
-        self._row_dir("Output Folder", self.var_outdir, self.browse_outdir, 3, **pad)
+        rows = [
+            ("BOM (.xlsx)", self.var_bom, self.browse_bom),
+            ("Template (.xlsx)", self.var_template, self.browse_template),
+            ("LookupTable (.xlsx)", self.var_lookup, self.browse_lookup),
+            ("Output Folder", self.var_outdir, self.browse_outdir),
+        ]
+        for r, (label, var, cmd) in enumerate(rows):
+            self._row_path(label, var, cmd, r, **pad)
 
         frm_btn = tk.Frame(self)
         frm_btn.grid(row=4, column=0, columnspan=3, sticky="ew", padx=10, pady=10)
@@ -963,45 +1395,56 @@ class App(tk.Tk):
         self.btn_clear = tk.Button(frm_btn, text="Clear", width=14, command=self.on_clear)
         self.btn_clear.pack(side="left", padx=10)
 
-        self.btn_quit = tk.Button(frm_btn, text="Quit", width=14, command=self.destroy)
+        self.btn_quit = tk.Button(frm_btn, text="Quit", width=14, command=self.on_close)
         self.btn_quit.pack(side="right")
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
         lbl_status = tk.Label(self, textvariable=self.var_status, anchor="w")
         lbl_status.grid(row=5, column=0, columnspan=3, sticky="ew", padx=10, pady=6)
 
         # ✅ EXE/스크립트 폴더에서 TEMPLATE/LOOKUPTABLE 자동 감지하여 프리필
-        app_dir = get_app_dir()
-        t, l = autodetect_default_files(app_dir)
+        t, l = autodetect_default_files(self.app_dir)
         if t and not self.var_template.get():
             self.var_template.set(str(t))
         if l and not self.var_lookup.get():
             self.var_lookup.set(str(l))
 
-    def _row_file(self, label, var, cmd, r, padx=10, pady=6):
+    def _row_path(self, label, var, cmd, r, padx=10, pady=6):
         tk.Label(self, text=label, width=16, anchor="w").grid(row=r, column=0, padx=padx, pady=pady, sticky="w")
         tk.Entry(self, textvariable=var, width=75).grid(row=r, column=1, padx=padx, pady=pady, sticky="w")
         tk.Button(self, text="Browse...", width=12, command=cmd).grid(row=r, column=2, padx=padx, pady=pady)
 
-    def _row_dir(self, label, var, cmd, r, padx=10, pady=6):
-        tk.Label(self, text=label, width=16, anchor="w").grid(row=r, column=0, padx=padx, pady=pady, sticky="w")
-        tk.Entry(self, textvariable=var, width=75).grid(row=r, column=1, padx=padx, pady=pady, sticky="w")
-        tk.Button(self, text="Browse...", width=12, command=cmd).grid(row=r, column=2, padx=padx, pady=pady)
+    def _check(self, p: Path) -> bool:
+        s = str(p)
+        if self._exist_cache.get(s):
+            return True
+        ok = p.is_file()
+        if ok:
+            self._exist_cache[s] = True
+        return ok
+
+    def _forget(self, p: str):
+        self._exist_cache.pop(str(Path(p)), None)
 
     def browse_bom(self):
-        p = filedialog.askopenfilename(title="Select BOM", filetypes=[("Excel files", "*.xlsx")])
+        p = filedialog.askopenfilename(title="Select BOM", filetypes=_XLSX_FILETYPES)
         if p:
+            self._forget(p)
             self.var_bom.set(p)
             if not self.var_outdir.get():
                 self.var_outdir.set(str(Path(p).parent))
 
     def browse_template(self):
-        p = filedialog.askopenfilename(title="Select Template", filetypes=[("Excel files", "*.xlsx")])
+        p = filedialog.askopenfilename(title="Select Template", filetypes=_XLSX_FILETYPES)
         if p:
+            self._forget(p)
             self.var_template.set(p)
 
     def browse_lookup(self):
-        p = filedialog.askopenfilename(title="Select LookupTable", filetypes=[("Excel files", "*.xlsx")])
+        p = filedialog.askopenfilename(title="Select LookupTable", filetypes=_XLSX_FILETYPES)
         if p:
+            self._forget(p)
             self.var_lookup.set(p)
 
     def browse_outdir(self):
@@ -1017,60 +1460,93 @@ class App(tk.Tk):
         self.var_status.set("Ready.")
 
         # Clear 후에도 자동 감지 프리필 다시 채움
-        app_dir = get_app_dir()
-        t, l = autodetect_default_files(app_dir)
+        t, l = autodetect_default_files(self.app_dir)
         if t:
             self.var_template.set(str(t))
         if l:
             self.var_lookup.set(str(l))
 
     def on_run(self):
+        # 입력칸(StringVar)이 경로의 유일한 기준: 직접 입력/자동 감지 프리필도 있으므로 Run 때마다 읽음
         bom = Path(self.var_bom.get())
         tpl = Path(self.var_template.get())
         lk = Path(self.var_lookup.get())
         outdir = Path(self.var_outdir.get()) if self.var_outdir.get() else None
 
-        if not bom.exists():
+        if not self._check(bom):
             messagebox.showerror("Error", "BOM 파일을 선택하세요.")
             return
-        if not tpl.exists():
+        if not self._check(tpl):
             messagebox.showerror("Error", "Template 파일을 선택하세요.")
             return
-        if not lk.exists():
+        if not self._check(lk):
             messagebox.showerror("Error", "LookupTable 파일을 선택하세요.")
             return
         if outdir is None:
             outdir = bom.parent
-        outdir.mkdir(parents=True, exist_ok=True)
+        outdir_key = str(outdir)
+        if outdir_key not in self._mkdir_done:
+            outdir.mkdir(parents=True, exist_ok=True)
+            self._mkdir_done.add(outdir_key)
 
         stem = bom.stem
         out_xlsx = outdir / f"{stem}_out.xlsx"
         out_txt = outdir / f"{stem}_issues.txt"
 
-        try:
-            self.var_status.set("Running...")
-            self.update_idletasks()
-
-            result = run_parser(bom, tpl, lk, out_xlsx, out_txt)
+        # 버튼을 먼저 잠가 중복 실행을 막고, 상태 표시는 이벤트 루프가 한가할 때 갱신
+        self.btn_run.config(state="disabled")
+        self.after_idle(self.var_status.set, "Running...")
+        fut = self.executor.submit(run_parser, bom, tpl, lk, out_xlsx, out_txt)
+        self._poll_id = self.after(100, self._poll_run, fut, outdir_key)
 
-            msg = (
-                f"완료!\n\n"
-                f"- Output Excel: {result['out_xlsx']}\n"
-                f"- Report TXT : {result['out_txt']}\n\n"
-                f"- Written counts: {result['written_counts']}\n"
-                f"- Ignored: {result['ignored']}\n"
-            )
-            self.var_status.set("Done.")
-            messagebox.showinfo("Done", msg)
+    def _poll_run(self, fut, outdir_key):
+        if not fut.done():
+            self._poll_id = self.after(100, self._poll_run, fut, outdir_key)
+            return
+        self._poll_id = None
 
+        self.btn_run.config(state="normal")
+        try:
+            result = fut.result()
         except Exception as e:
+            self._mkdir_done.discard(outdir_key)
             self.var_status.set("Error.")
             messagebox.showerror("Error", f"{e}")
+            return
+
+        msg = (
+            f"완료!\n\n"
+            f"- Output Excel: {result['out_xlsx']}\n"
+            f"- Report TXT : {result['out_txt']}\n\n"
+            f"- Written counts: {result['written_counts']}\n"
+            f"- Ignored: {result['ignored']}\n"
+        )
+        self.var_status.set("Done.")
+        messagebox.showinfo("Done", msg)
+
+    def on_close(self):
+        # 실행 중 창을 닫아도 폴링이 파괴된 창에 after()를 걸지 않도록 먼저 취소.
+        # 이미 시작된 파싱은 중단할 수 없으므로 끝까지 저장되고, 대기 중인 작업만 취소됨
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
 
 
 # =========================
 # CLI
 # =========================
+def _positive_int(s: str) -> int:
+    try:
+        n = int(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"정수가 아닙니다: {s!r}")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"1 이상이어야 합니다: {n}")
+    return n
+
+
 def parse_args():
     p = argparse.ArgumentParser(description="BOM Parser (Excel -> Template Derating)")
     p.add_argument("--bom", type=str, default="", help="Input BOM .xlsx path")
@@ -1078,6 +1554,12 @@ def parse_args():
     p.add_argument("--lookup", type=str, default="", help="LookupTable .xlsx path")
     p.add_argument("--outdir", type=str, default="", help="Output directory")
     p.add_argument("--nogui", action="store_true", help="CLI only")
+    p.add_argument("--engine", choices=READ_ENGINES, default="openpyxl",
+                   help="BOM/LookupTable reader (calamine: python-calamine 설치 시 사용, BOM은 첫 시트 기준)")
+    p.add_argument("--threads", type=_positive_int, default=1,
+                   help="Template/LookupTable 로드에 쓸 스레드 수 (1: 순차, 2 이상: 두 파일을 동시에 로드, 최대 2개 사용)")
+    p.add_argument("--no-lookup-cache", action="store_true",
+                   help=f"파싱된 LookupTable 디스크 캐시(~/.cache/bom_parser) 사용 안 함 (환경변수 {_LOOKUP_CACHE_ENV_OFF}=1 과 같음)")
     return p.parse_args()
 
 
@@ -1096,7 +1578,10 @@ def main():
         out_xlsx = outdir / f"{bom.stem}_out.xlsx"
         out_txt = outdir / f"{bom.stem}_issues.txt"
 
-        result = run_parser(bom, tpl, lk, out_xlsx, out_txt)
+        if args.engine == "calamine" and not calamine_available():
+            print("python-calamine이 설치되어 있지 않아 openpyxl로 읽습니다.")
+        result = run_parser(bom, tpl, lk, out_xlsx, out_txt, engine=args.engine, threads=args.threads,
+                            lookup_cache=not args.no_lookup_cache)
 
         print("DONE")
         print("Output:", result["out_xlsx"])